@@ -1,24 +1,31 @@
 import os
 import secrets
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
 from bson import ObjectId
 
+from .cache import TTLCache
 from .database import get_database
+from .hashing import HashingOverloaded, password_hasher
 
 # Secret key and algorithm for JWT
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Cache of resolved users keyed by access token
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+# Comma-separated emails allowed to use the /admin endpoints
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -39,12 +46,26 @@ class UserInDB(BaseModel):
     hashed_password: str
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def _hashing_overloaded():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again",
+        headers={"Retry-After": "1"},
+    )
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def verify_password(plain_password, hashed_password):
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except HashingOverloaded:
+        raise _hashing_overloaded()
+
+
+async def get_password_hash(password):
+    try:
+        return await password_hasher.hash(password)
+    except HashingOverloaded:
+        raise _hashing_overloaded()
 
 
 async def get_user_by_email(db, email: str):
@@ -55,7 +76,7 @@ async def authenticate_user(db, username: str, password: str):
     user = await db.users.find_one({"username": username})
     if not user:
         return False
-    if not verify_password(password, user["hashed_password"]):
+    if not await verify_password(password, user["hashed_password"]):
         return False
     return user
 
@@ -86,10 +107,33 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_d
     except JWTError:
         raise credentials_exception
     
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        return dict(cached_user)
+    
     user = await db.users.find_one({"email": token_data.email})
     if user is None:
         raise credentials_exception
-    return user
+    
+    # Never cache past the token's own expiry
+    ttl = payload.get("exp", 0) - time.time()
+    user_cache.set(token, user, ttl=ttl)
+    return dict(user)
+
+
+def invalidate_cached_user(user_id):
+    """Drop every cached token that resolves to the given user."""
+    user_cache.invalidate_where(lambda token, user: user["_id"] == user_id)
+
+
+async def disable_user(db, user_id) -> bool:
+    """
+    Mark the account disabled and drop its cached tokens in this process;
+    other workers stop trusting their cached copy within USER_CACHE_TTL_SECONDS.
+    """
+    result = await db.users.update_one({"_id": user_id}, {"$set": {"disabled": True}})
+    invalidate_cached_user(user_id)
+    return result.matched_count > 0
 
 
 async def get_current_active_user(current_user: Dict[str, Any] = Depends(get_current_user)):
@@ -98,9 +142,20 @@ async def get_current_active_user(current_user: Dict[str, Any] = Depends(get_cur
     return current_user
 
 
+async def authenticate_token(token: str, db) -> Dict[str, Any]:
+    """For WebSockets, which can't send an Authorization header from the browser"""
+    return await get_current_active_user(await get_current_user(token=token, db=db))
+
+
+async def get_current_admin_user(current_user: Dict[str, Any] = Depends(get_current_active_user)):
+    if current_user.get("email", "").lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+
 async def create_user(db, user_data):
     # Hash the password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     
     # Create user document
     user_doc = {
@@ -176,11 +231,12 @@ async def reset_password(token: str, new_password: str, db):
         return False
     
     # Update user's password
-    hashed_password = get_password_hash(new_password)
+    hashed_password = await get_password_hash(new_password)
     await db.users.update_one(
         {"_id": user["_id"]},
         {"$set": {"hashed_password": hashed_password}}
     )
+    invalidate_cached_user(user["_id"])
     
     # Delete the reset token
     await db.password_resets.delete_one({"user_id": user["_id"]})
@@ -0,0 +1,292 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from .classifier import tag_conversation_batch, tag_note_batch
+
+# Defaults for the emotion backfill; each run can override them
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "500"))
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "2"))
+BACKFILL_MAX_DOCS_PER_SECOND = float(os.getenv("BACKFILL_MAX_DOCS_PER_SECOND", "1000"))
+# A running backfill is leased to one worker process and the lease is renewed
+# at every checkpoint; another worker may take over once it lapses
+BACKFILL_LEASE_SECONDS = float(os.getenv("BACKFILL_LEASE_SECONDS", "60"))
+
+# Lease owner id of this worker process
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# What each backfill scans and how it tags a batch
+TARGETS = {
+    "notes": {
+        "filter": {"emotion": {"$exists": False}},
+        "projection": {"title": 1, "content": 1},
+        "tag": tag_note_batch,
+    },
+    "conversations": {
+        "filter": {"emotions_tagged": {"$ne": True}},
+        "projection": {"messages.role": 1, "messages.content": 1, "messages.emotion": 1},
+        "tag": tag_conversation_batch,
+    },
+}
+
+
+class BackfillClaimed(Exception):
+    """Raised when another worker process holds the lease on a backfill."""
+
+
+class BackfillJob:
+    """
+    Resumable emotion backfill over one collection. Documents are scanned in
+    _id order; after every round of batches the last _id is checkpointed in
+    db.jobs, so a restart picks up where the previous run stopped. Only the
+    worker holding the checkpoint's lease runs or saves the job.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        self.checkpoint_id = f"emotion_backfill:{target}"
+        self.status = "idle"
+        self.last_id = None
+        self.processed = 0
+        self.tagged = 0
+        self.started_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.options: Dict[str, Any] = {}
+        self.owned = False
+        self._task: Optional[asyncio.Task] = None
+        self._run_started = 0.0
+        self._run_processed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def load(self, db):
+        checkpoint = await db.jobs.find_one({"_id": self.checkpoint_id})
+        if checkpoint:
+            self.status = checkpoint.get("status", "idle")
+            self.last_id = checkpoint.get("last_id")
+            self.processed = checkpoint.get("processed", 0)
+            self.tagged = checkpoint.get("tagged", 0)
+            self.started_at = checkpoint.get("started_at")
+            self.options = checkpoint.get("options", {})
+        return checkpoint
+
+    async def claim(self, db) -> bool:
+        """Atomically take the lease unless another worker holds a live one."""
+        now = datetime.utcnow()
+        try:
+            await db.jobs.find_one_and_update(
+                {"_id": self.checkpoint_id,
+                 "$or": [{"owner": None}, {"owner": WORKER_ID}, {"lease_expires_at": {"$lt": now}}]},
+                {"$set": {"owner": WORKER_ID, "lease_expires_at": now + timedelta(seconds=BACKFILL_LEASE_SECONDS),
+                          "stop_requested": False}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The checkpoint exists and its lease belongs to someone else
+            return False
+        self.owned = True
+        return True
+
+    async def save(self, db, release: bool = False) -> Dict[str, Any]:
+        """
+        Checkpoint progress and renew the lease, or give it up with release.
+        Returns the checkpoint as it was, so the owner sees stop requests.
+        """
+        now = datetime.utcnow()
+        fields = {
+            "status": self.status,
+            "last_id": self.last_id,
+            "processed": self.processed,
+            "tagged": self.tagged,
+            "started_at": self.started_at,
+            "options": self.options,
+            "error": self.error,
+            "updated_at": now,
+            "lease_expires_at": now + timedelta(seconds=BACKFILL_LEASE_SECONDS),
+        }
+        if release:
+            fields.update(owner=None, lease_expires_at=None, stop_requested=False)
+        checkpoint = await db.jobs.find_one_and_update(
+            {"_id": self.checkpoint_id, "owner": WORKER_ID},
+            {"$set": fields},
+            projection={"stop_requested": 1}
+        )
+        if release or checkpoint is None:
+            self.owned = False
+        if checkpoint is None:
+            raise BackfillClaimed()
+        return checkpoint
+
+    async def start(self, db, batch_size: int = None, concurrency: int = None, max_docs_per_second: float = None):
+        if self.running:
+            return
+        if not await self.claim(db):
+            raise BackfillClaimed()
+        await self.load(db)
+        if self.status in ("completed", "failed", "idle"):
+            # A finished run starts over so documents untagged since are caught
+            self.last_id, self.processed, self.tagged = None, 0, 0
+            self.started_at = datetime.utcnow()
+        self.options = {
+            "batch_size": batch_size or self.options.get("batch_size", BACKFILL_BATCH_SIZE),
+            "concurrency": concurrency or self.options.get("concurrency", BACKFILL_CONCURRENCY),
+            "max_docs_per_second": max_docs_per_second or self.options.get("max_docs_per_second",
+                                                                           BACKFILL_MAX_DOCS_PER_SECOND),
+        }
+        self.status = "running"
+        self.error = None
+        await self.save(db)
+        self._task = asyncio.get_running_loop().create_task(self._run(db))
+
+    async def stop(self, db, pause: bool = True):
+        """
+        Stop the worker and release the lease; a paused job stays resumable,
+        otherwise it is left running for whichever worker starts up next.
+        Pausing a job leased to another worker asks it to stop at its next
+        checkpoint.
+        """
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if not self.owned:
+            if not pause:
+                return
+            await self.load(db)
+            if self.status != "running":
+                return
+            if not await self.claim(db):
+                await db.jobs.update_one({"_id": self.checkpoint_id}, {"$set": {"stop_requested": True}})
+                return
+        if pause and self.status == "running":
+            self.status = "stopped"
+        await self.save(db, release=True)
+
+    async def _run(self, db):
+        target = TARGETS[self.target]
+        collection = db[self.target]
+        batch_size = self.options["batch_size"]
+        self._run_started = time.monotonic()
+        self._run_processed = 0
+        try:
+            while True:
+                # Read the next few batches in _id order and tag them concurrently
+                batches, cursor_id = [], self.last_id
+                for _ in range(self.options["concurrency"]):
+                    query = dict(target["filter"])
+                    if cursor_id is not None:
+                        query["_id"] = {"$gt": cursor_id}
+                    docs = await collection.find(query, target["projection"]) \
+                        .sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+                    if not docs:
+                        break
+                    batches.append(docs)
+                    cursor_id = docs[-1]["_id"]
+                if not batches:
+                    self.status = "completed"
+                    await self.save(db, release=True)
+                    return
+
+                tagged = await asyncio.gather(*[target["tag"](db, docs) for docs in batches])
+                count = sum(len(docs) for docs in batches)
+                self.last_id = cursor_id
+                self.processed += count
+                self.tagged += sum(tagged)
+                self._run_processed += count
+                checkpoint = await self.save(db)
+                if checkpoint.get("stop_requested"):
+                    self.status = "stopped"
+                    await self.save(db, release=True)
+                    return
+
+                # Stay under the rate limit so live traffic keeps priority
+                expected = self._run_processed / self.options["max_docs_per_second"]
+                elapsed = time.monotonic() - self._run_started
+                await asyncio.sleep(max(0.0, expected - elapsed))
+        except asyncio.CancelledError:
+            raise
+        except BackfillClaimed:
+            # The lease lapsed and another worker has taken the job over
+            self.error = "Taken over by another worker"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            try:
+                await self.save(db, release=True)
+            except BackfillClaimed:
+                pass
+
+    def progress(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._run_started if self._run_started else 0.0
+        return {
+            "target": self.target,
+            "status": self.status,
+            "running": self.running,
+            "processed": self.processed,
+            "tagged": self.tagged,
+            "last_id": str(self.last_id) if self.last_id is not None else None,
+            "started_at": self.started_at,
+            "docs_per_second": self._run_processed / elapsed if elapsed > 0 else 0.0,
+            "options": self.options,
+            "error": self.error,
+        }
+
+
+backfill_jobs = {target: BackfillJob(target) for target in TARGETS}
+
+# Standby tasks waiting to take over a backfill leased to another worker
+_standby_tasks: List[asyncio.Task] = []
+
+
+async def _resume_when_free(job: BackfillJob, db):
+    """Take the job over if its owner dies without releasing the lease."""
+    while True:
+        await asyncio.sleep(BACKFILL_LEASE_SECONDS)
+        try:
+            checkpoint = await job.load(db)
+            if job.running or not checkpoint or checkpoint.get("status") != "running":
+                return
+            await job.start(db)
+            return
+        except Exception:
+            # Still leased elsewhere, or Mongo briefly unavailable; check again next period
+            continue
+
+
+async def resume_backfills(db):
+    """
+    Restart any backfill that was still running when the process stopped.
+    Every worker calls this at startup; the lease lets only one resume it.
+    """
+    for job in backfill_jobs.values():
+        checkpoint = await job.load(db)
+        if checkpoint and checkpoint.get("status") == "running":
+            try:
+                await job.start(db)
+            except BackfillClaimed:
+                _standby_tasks.append(asyncio.get_running_loop().create_task(_resume_when_free(job, db)))
+
+
+async def stop_backfills(db):
+    # Leave status as "running" so the next startup resumes from the checkpoint
+    for task in _standby_tasks:
+        task.cancel()
+    await asyncio.gather(*_standby_tasks, return_exceptions=True)
+    _standby_tasks.clear()
+    for job in backfill_jobs.values():
+        try:
+            await job.stop(db, pause=False)
+        except BackfillClaimed:
+            pass
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from .cache import TTLCache
+
+# Exact-match cache of chat completions ("off", "memory" or "mongo")
+CHAT_CACHE_BACKEND = os.getenv("CHAT_CACHE_BACKEND", "off").lower()
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "5000"))
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def cache_key(messages: List[Dict[str, str]], model: str, temperature: float, user_id: Any) -> str:
+    """
+    Hash of the normalized conversation, model and temperature. A prompt that
+    carries earlier user turns is personal, so its key is scoped to the user;
+    an opening message (system prompt and greetings only) is shared.
+    """
+    earlier_user_turns = any(m["role"] == "user" for m in messages[:-1])
+    scope = f"user:{user_id}" if earlier_user_turns else "global"
+    normalized = [[m["role"], _normalize(m["content"])] for m in messages]
+    raw = json.dumps([scope, model, temperature, normalized], separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class MemoryCacheBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[Dict[str, str]]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Dict[str, str]):
+        self._cache.set(key, value)
+
+
+class MongoCacheBackend:
+    """
+    Shares hits across workers through the chat_cache collection. Expiry is
+    enforced by the TTL index on expires_at created in connect_to_mongo.
+    """
+
+    def __init__(self, get_db, ttl: float):
+        self._get_db = get_db
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[Dict[str, str]]:
+        db = await self._get_db()
+        doc = await db.chat_cache.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.utcnow()}},
+            {"value": 1}
+        )
+        return doc["value"] if doc else None
+
+    async def set(self, key: str, value: Dict[str, str]):
+        db = await self._get_db()
+        await db.chat_cache.update_one(
+            {"_id": key},
+            {"$set": {"value": value, "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl)}},
+            upsert=True
+        )
+
+
+class CompletionCache:
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get(self, key: str) -> Optional[Dict[str, str]]:
+        if not self.enabled:
+            return None
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, str]):
+        if self.enabled:
+            await self.backend.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": CHAT_CACHE_BACKEND if self.enabled else "off",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def build_completion_cache(get_db) -> CompletionCache:
+    if CHAT_CACHE_BACKEND == "memory":
+        return CompletionCache(MemoryCacheBackend(CHAT_CACHE_SIZE, CHAT_CACHE_TTL_SECONDS))
+    if CHAT_CACHE_BACKEND == "mongo":
+        return CompletionCache(MongoCacheBackend(get_db, CHAT_CACHE_TTL_SECONDS))
+    return CompletionCache()
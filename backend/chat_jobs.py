@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Queue for asynchronous chat (POST /emotional-chat/jobs): "memory" (per
+# worker process) or "mongo" (shared, so any process can pick a job up)
+CHAT_JOB_BACKEND = os.getenv("CHAT_JOB_BACKEND", "memory").lower()
+# Jobs processed at once per process; this caps concurrent upstream calls
+CHAT_JOB_WORKERS = int(os.getenv("CHAT_JOB_WORKERS", "8"))
+# Jobs allowed to wait; beyond this new jobs are rejected with 503
+CHAT_JOB_QUEUE_SIZE = int(os.getenv("CHAT_JOB_QUEUE_SIZE", "1000"))
+# How long finished jobs can still be fetched
+CHAT_JOB_RESULT_TTL_SECONDS = float(os.getenv("CHAT_JOB_RESULT_TTL_SECONDS", "600"))
+
+# Mongo-backed workers and waiters poll for changes, backing off from the
+# first delay to the second while nothing changes; workers retry store
+# errors on the same schedule
+MONGO_POLL_SECONDS = 0.2
+MONGO_POLL_MAX_SECONDS = 5.0
+
+FINISHED = ("done", "failed")
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+def new_job(user: Dict[str, Any], request: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "user_id": user["_id"],
+        "request": request,
+        "status": "queued",
+        "result": None,
+        "error": None,
+        "created_at": datetime.utcnow(),
+    }
+
+
+class MemoryJobStore:
+    """Bounded asyncio queue of jobs plus a table of their states, per process."""
+
+    def __init__(self, queue_size: int, result_ttl: float):
+        self.queue_size = queue_size
+        self.result_ttl = result_ttl
+        self.jobs: Dict[ObjectId, Dict[str, Any]] = {}
+        self.users: Dict[ObjectId, Dict[str, Any]] = {}
+        self.finished: Dict[ObjectId, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue] = None
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        # Created on first use so it belongs to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    def _prune(self):
+        now = time.monotonic()
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.get("expires") and job["expires"] <= now]:
+            self.jobs.pop(job_id, None)
+            self.finished.pop(job_id, None)
+
+    async def put(self, job: Dict[str, Any], user: Dict[str, Any]):
+        self._prune()
+        try:
+            self.queue.put_nowait(job["_id"])
+        except asyncio.QueueFull:
+            raise QueueFull()
+        self.jobs[job["_id"]] = job
+        self.users[job["_id"]] = user
+        self.finished[job["_id"]] = asyncio.Event()
+
+    async def take(self):
+        job_id = await self.queue.get()
+        job = self.jobs[job_id]
+        job.update(status="running", started_at=datetime.utcnow())
+        return job, self.users.pop(job_id)
+
+    async def finish(self, job_id: ObjectId, fields: Dict[str, Any]):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job.update(fields, finished_at=datetime.utcnow(), expires=time.monotonic() + self.result_ttl)
+        self.finished[job_id].set()
+
+    async def get(self, job_id: ObjectId) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id: ObjectId, timeout: float) -> Optional[Dict[str, Any]]:
+        event = self.finished.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.jobs.get(job_id)
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+
+class MongoJobStore:
+    """
+    Jobs in the chat_jobs collection. Workers in any process claim the oldest
+    queued job with find_one_and_update; finished jobs expire via a TTL index.
+    """
+
+    def __init__(self, get_db, queue_size: int, result_ttl: float):
+        self.get_db = get_db
+        self.queue_size = queue_size
+        self.result_ttl = result_ttl
+        self._submitted: Optional[asyncio.Event] = None
+
+    @property
+    def submitted(self) -> asyncio.Event:
+        # Created on first use so it belongs to the running event loop
+        if self._submitted is None:
+            self._submitted = asyncio.Event()
+        return self._submitted
+
+    async def put(self, job: Dict[str, Any], user: Dict[str, Any]):
+        db = await self.get_db()
+        # Approximate under concurrent submits, which is fine for load shedding
+        if await db.chat_jobs.count_documents({"status": "queued"}) >= self.queue_size:
+            raise QueueFull()
+        await db.chat_jobs.insert_one(job)
+        # Wake this process's idle workers instead of waiting out their backoff
+        self.submitted.set()
+
+    async def take(self):
+        db = await self.get_db()
+        delay = MONGO_POLL_SECONDS
+        while True:
+            now = datetime.utcnow()
+            # A job orphaned by a crashed worker still expires eventually
+            job = await db.chat_jobs.find_one_and_update(
+                {"status": "queued"},
+                {"$set": {"status": "running", "started_at": now,
+                          "expires_at": now + timedelta(seconds=self.result_ttl)}},
+                sort=[("created_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if job is not None:
+                user = await db.users.find_one({"_id": job["user_id"]})
+                if user is not None:
+                    return job, user
+                await self.finish(job["_id"], {"status": "failed", "error": "User not found", "status_code": 404})
+                continue
+            # Jobs from other processes are picked up within the backoff delay
+            try:
+                await asyncio.wait_for(self.submitted.wait(), delay)
+                self.submitted.clear()
+                delay = MONGO_POLL_SECONDS
+            except asyncio.TimeoutError:
+                delay = min(delay * 2, MONGO_POLL_MAX_SECONDS)
+
+    async def finish(self, job_id: ObjectId, fields: Dict[str, Any]):
+        db = await self.get_db()
+        now = datetime.utcnow()
+        await db.chat_jobs.update_one(
+            {"_id": job_id},
+            {"$set": dict(fields, finished_at=now, expires_at=now + timedelta(seconds=self.result_ttl))}
+        )
+
+    async def get(self, job_id: ObjectId) -> Optional[Dict[str, Any]]:
+        db = await self.get_db()
+        return await db.chat_jobs.find_one({"_id": job_id})
+
+    async def wait(self, job_id: ObjectId, timeout: float) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        delay = MONGO_POLL_SECONDS
+        while True:
+            job = await self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED or remaining <= 0:
+                return job
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, MONGO_POLL_MAX_SECONDS)
+
+    def depth(self) -> Optional[int]:
+        return None
+
+
+class ChatJobQueue:
+    """
+    Runs chat requests on a fixed pool of worker tasks so a burst waits in
+    the queue instead of holding HTTP connections open. Workers are started
+    by the app's startup hook, so jobs another process left queued are
+    picked up too; the handler receives (user, request) and returns the
+    chat result, raising HTTPException for failures worth reporting.
+    """
+
+    def __init__(self, store, handler: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 workers: int = 8):
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def submit(self, user: Dict[str, Any], request: Dict[str, Any]) -> Dict[str, Any]:
+        # No-op once the startup hook has run; covers apps that never call start()
+        self.start()
+        job = new_job(user, request)
+        await self.store.put(job, user)
+        return job
+
+    async def _work(self):
+        delay = MONGO_POLL_SECONDS
+        while True:
+            try:
+                job, user = await self.store.take()
+            except Exception:
+                # A store outage must not kill the worker while submit() keeps queueing
+                logger.exception("Chat job worker could not take a job, retrying in %.1fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MONGO_POLL_MAX_SECONDS)
+                continue
+            delay = MONGO_POLL_SECONDS
+            try:
+                result = await self.handler(user, job["request"])
+                fields = {"status": "done", "result": result}
+            except HTTPException as e:
+                fields = {"status": "failed", "error": e.detail, "status_code": e.status_code}
+            except Exception as e:
+                fields = {"status": "failed", "error": f"Failed to process chat: {str(e)}", "status_code": 500}
+            await self._finish(job["_id"], fields)
+
+    async def _finish(self, job_id: ObjectId, fields: Dict[str, Any]):
+        """Record the outcome, retrying so a taken job is never left running forever."""
+        delay = MONGO_POLL_SECONDS
+        while True:
+            try:
+                await self.store.finish(job_id, fields)
+                return
+            except Exception:
+                logger.exception("Could not record chat job %s, retrying in %.1fs", job_id, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MONGO_POLL_MAX_SECONDS)
+
+    async def get(self, job_id: ObjectId, user_id) -> Optional[Dict[str, Any]]:
+        job = await self.store.get(job_id)
+        return job if job is not None and job["user_id"] == user_id else None
+
+    async def wait(self, job_id: ObjectId, user_id, timeout: float) -> Optional[Dict[str, Any]]:
+        job = await self.get(job_id, user_id)
+        if job is None or job["status"] in FINISHED:
+            return job
+        return await self.store.wait(job_id, timeout)
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+def build_job_queue(get_db, handler) -> ChatJobQueue:
+    if CHAT_JOB_BACKEND == "mongo":
+        store = MongoJobStore(get_db, CHAT_JOB_QUEUE_SIZE, CHAT_JOB_RESULT_TTL_SECONDS)
+    else:
+        store = MemoryJobStore(CHAT_JOB_QUEUE_SIZE, CHAT_JOB_RESULT_TTL_SECONDS)
+    return ChatJobQueue(store, handler, CHAT_JOB_WORKERS)
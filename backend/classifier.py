@@ -0,0 +1,160 @@
+import asyncio
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne
+
+# Optional .npz with trained "weights" (buckets x emotions), "bias" and "labels"
+CLASSIFIER_WEIGHTS = os.getenv("CLASSIFIER_WEIGHTS")
+CLASSIFIER_BUCKETS = 1 << 16
+
+# Scores below this leave a text tagged neutral
+NEUTRAL_THRESHOLD = 0.5
+
+EMOTIONS = ["happy", "sad", "angry", "anxious", "calm", "hopeful", "neutral"]
+
+# Seed lexicon: unigram and bigram cues per emotion
+LEXICON: Dict[str, List[str]] = {
+    "happy": ["happy", "glad", "joy", "joyful", "great", "awesome", "excited", "love", "loved", "fun",
+              "wonderful", "amazing", "proud", "grateful", "thankful", "delighted", "smile", "laughed",
+              "celebrate", "fantastic", "good day", "feel good", "so good"],
+    "sad": ["sad", "unhappy", "depressed", "down", "lonely", "alone", "cry", "cried", "crying", "miss",
+            "lost", "grief", "hurt", "heartbroken", "empty", "tears", "hopeless", "miserable",
+            "not happy", "feel low", "let down"],
+    "angry": ["angry", "mad", "furious", "annoyed", "irritated", "hate", "frustrated", "frustrating",
+              "unfair", "rage", "pissed", "fed up", "sick of", "resent", "yelled"],
+    "anxious": ["anxious", "anxiety", "worried", "worry", "nervous", "stressed", "stress", "panic",
+                "scared", "afraid", "fear", "overwhelmed", "deadline", "tense", "uneasy", "can't sleep",
+                "cannot sleep", "what if", "freaking out"],
+    "calm": ["calm", "relaxed", "peaceful", "rested", "content", "fine", "okay", "steady", "quiet",
+             "meditation", "breathe", "at peace", "chilled"],
+    "hopeful": ["hope", "hopeful", "optimistic", "looking forward", "better", "improving", "excited for",
+                "can do", "will get", "tomorrow", "motivated", "getting better"],
+}
+
+_TOKEN = re.compile(r"[a-z']+")
+
+
+def _features(text: str) -> List[str]:
+    tokens = _TOKEN.findall(text.lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode()) % CLASSIFIER_BUCKETS
+
+
+class EmotionClassifier:
+    """
+    Linear model over hashed unigrams and bigrams. Weights live in one
+    (buckets x emotions) float32 array, so a batch is scored with a single
+    gather-and-sum instead of per-text Python loops over emotions.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: List[str]):
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.labels = list(labels)
+
+    @classmethod
+    def from_lexicon(cls, lexicon: Dict[str, List[str]] = LEXICON) -> "EmotionClassifier":
+        labels = EMOTIONS
+        weights = np.zeros((CLASSIFIER_BUCKETS, len(labels)), dtype=np.float32)
+        for emotion, cues in lexicon.items():
+            column = labels.index(emotion)
+            for cue in cues:
+                # Bigram cues are more specific, so they weigh more
+                weights[_bucket(cue), column] += 2.0 if " " in cue else 1.0
+        return cls(weights, np.zeros(len(labels), dtype=np.float32), labels)
+
+    @classmethod
+    def from_file(cls, path: str) -> "EmotionClassifier":
+        data = np.load(path, allow_pickle=False)
+        return cls(data["weights"], data["bias"], [str(label) for label in data["labels"]])
+
+    def scores(self, texts: List[str]) -> np.ndarray:
+        rows, columns = [], []
+        for row, text in enumerate(texts):
+            buckets = [_bucket(feature) for feature in _features(text or "")]
+            rows.extend([row] * len(buckets))
+            columns.extend(buckets)
+        scores = np.tile(self.bias, (len(texts), 1))
+        if columns:
+            np.add.at(scores, np.asarray(rows, dtype=np.intp), self.weights[np.asarray(columns, dtype=np.intp)])
+        return scores
+
+    def predict(self, texts: List[str]) -> List[str]:
+        if not texts:
+            return []
+        scores = self.scores(texts)
+        best = scores.argmax(axis=1)
+        confident = scores[np.arange(len(texts)), best] >= NEUTRAL_THRESHOLD
+        return [self.labels[i] if ok else "neutral" for i, ok in zip(best, confident)]
+
+
+_classifier: Optional[EmotionClassifier] = None
+
+
+def get_classifier() -> EmotionClassifier:
+    global _classifier
+    if _classifier is None:
+        if CLASSIFIER_WEIGHTS:
+            _classifier = EmotionClassifier.from_file(CLASSIFIER_WEIGHTS)
+        else:
+            _classifier = EmotionClassifier.from_lexicon()
+    return _classifier
+
+
+def classify_batch(texts: Iterable[str]) -> List[str]:
+    return get_classifier().predict(list(texts))
+
+
+def classify(text: str) -> str:
+    return classify_batch([text])[0]
+
+
+async def classify_batch_async(texts: List[str]) -> List[str]:
+    """Classify a large batch on the default executor so the event loop stays free."""
+    return await asyncio.get_running_loop().run_in_executor(None, classify_batch, texts)
+
+
+def note_text(note: Dict) -> str:
+    return f"{note.get('title') or ''}\n{note.get('content') or ''}"
+
+
+async def tag_note_batch(db, notes: List[Dict]) -> int:
+    """Classify a batch of note documents in one pass and write the tags back."""
+    if not notes:
+        return 0
+    emotions = await classify_batch_async([note_text(note) for note in notes])
+    await db.notes.bulk_write(
+        [UpdateOne({"_id": note["_id"]}, {"$set": {"emotion": emotion}}) for note, emotion in zip(notes, emotions)],
+        ordered=False
+    )
+    return len(notes)
+
+
+async def tag_conversation_batch(db, conversations: List[Dict]) -> int:
+    """
+    Tag every untagged user message in a batch of conversations with a
+    single classifier call, then mark the conversations as tagged.
+    """
+    if not conversations:
+        return 0
+    targets, texts = [], []
+    for conversation in conversations:
+        for position, message in enumerate(conversation.get("messages", [])):
+            if message.get("role") == "user" and not message.get("emotion"):
+                targets.append((conversation["_id"], position))
+                texts.append(message.get("content", ""))
+    updates: Dict = {conversation["_id"]: {"emotions_tagged": True} for conversation in conversations}
+    for (conversation_id, position), emotion in zip(targets, await classify_batch_async(texts)):
+        updates[conversation_id][f"messages.{position}.emotion"] = emotion
+    await db.conversations.bulk_write(
+        [UpdateOne({"_id": conversation_id}, {"$set": fields}) for conversation_id, fields in updates.items()],
+        ordered=False
+    )
+    return len(texts)
@@ -0,0 +1,77 @@
+import os
+from typing import List, Optional
+
+# Token budget for the prompt sent upstream. llama3-8b-8192 has an 8192-token
+# context and we ask for up to 800 completion tokens, so leave headroom.
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "6000"))
+CHAT_CONTEXT_SUMMARY = os.getenv("CHAT_CONTEXT_SUMMARY", "true").lower() in ("1", "true", "yes")
+
+# Per-message framing overhead (role markers etc.) in the chat template
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Characters kept from each dropped user turn in the rolling summary
+SUMMARY_CHARS_PER_TURN = 120
+SUMMARY_MAX_CHARS = 1200
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message) -> int:
+    return estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def summarize_turns(turns, previous: Optional[str] = None) -> str:
+    """
+    Extractive rolling summary of dropped turns: the opening of each user
+    message, appended to any previous summary and capped in length.
+    """
+    points = [previous] if previous else []
+    for turn in turns:
+        if turn.role == "user":
+            points.append(turn.content.strip().split("\n")[0][:SUMMARY_CHARS_PER_TURN])
+    summary = " | ".join(points)
+    if len(summary) > SUMMARY_MAX_CHARS:
+        # Keep the most recent points when the summary outgrows its cap
+        summary = summary[-SUMMARY_MAX_CHARS:]
+        summary = summary[summary.find(" | ") + 3:] if " | " in summary else summary
+    return summary
+
+
+def fit_to_budget(messages: List, make_message, budget: int = CHAT_CONTEXT_TOKEN_BUDGET,
+                  summarize: bool = CHAT_CONTEXT_SUMMARY, previous_summary: Optional[str] = None):
+    """
+    Trim a conversation to the token budget. System messages and the final
+    (current) message are always kept; earlier turns are kept newest first
+    while they fit. When turns are dropped (or an older summary exists) and
+    summarize is on, a rolling summary is inserted as a system message ahead
+    of the kept turns. Returns (messages, summary).
+    """
+    system = [m for m in messages if m.role == "system"]
+    turns = [m for m in messages if m.role != "system"]
+    total = sum(message_tokens(m) for m in messages)
+    if not turns or (total <= budget and not previous_summary):
+        return list(messages), previous_summary
+
+    # Reserve room for the largest summary we could produce
+    reserve = 0
+    if summarize:
+        reserve = SUMMARY_MAX_CHARS // 4 + 1 + MESSAGE_OVERHEAD_TOKENS + estimate_tokens(SUMMARY_PREFIX)
+
+    used = sum(message_tokens(m) for m in system) + message_tokens(turns[-1]) + reserve
+    index = len(turns) - 2
+    while index >= 0 and used + message_tokens(turns[index]) <= budget:
+        used += message_tokens(turns[index])
+        index -= 1
+
+    dropped, kept = turns[:index + 1], turns[index + 1:]
+    if not summarize:
+        return system + kept, None
+
+    summary = summarize_turns(dropped, previous_summary) if dropped else previous_summary
+    if not summary:
+        return system + kept, None
+    return system + [make_message(role="system", content=SUMMARY_PREFIX + summary)] + kept, summary
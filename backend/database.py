@@ -2,6 +2,8 @@ import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 
+from .metrics import MongoCommandMetrics
+
 load_dotenv()
 
 MONGODB_URL = os.getenv("MONGODB_URL")
@@ -15,16 +17,33 @@ async def get_database():
 
 async def connect_to_mongo():
     global client, database
-    client = AsyncIOMotorClient(MONGODB_URL)
+    client = AsyncIOMotorClient(MONGODB_URL, event_listeners=[MongoCommandMetrics()])
     database = client[DATABASE_NAME]
     print(f"✅ Connected to MongoDB at {MONGODB_URL}")
 
     # Create indexes
     await database.users.create_index("email", unique=True)
     await database.users.create_index("username")
-    await database.notes.create_index("user_id")
+    await database.notes.create_index([("user_id", 1), ("updated_at", -1), ("_id", -1)])
+    # Text search is always scoped to one user, so user_id prefixes the text index
+    await database.notes.create_index(
+        [("user_id", 1), ("title", "text"), ("content", "text")],
+        weights={"title": 3, "content": 1},
+        name="notes_text"
+    )
+    await database.conversations.create_index([("user_id", 1), ("updated_at", -1), ("_id", -1)])
+    # Conversations saved before updated_at existed sort by their creation time
+    await database.conversations.update_many(
+        {"updated_at": {"$exists": False}},
+        [{"$set": {"updated_at": "$created_at"}}]
+    )
+    await database.emotion_daily.create_index([("user_id", 1), ("day", 1)], unique=True)
     await database.password_resets.create_index("token", unique=True)
     await database.password_resets.create_index("expires_at")
+    await database.chat_cache.create_index("expires_at", expireAfterSeconds=0)
+    await database.rate_limits.create_index("expires_at", expireAfterSeconds=0)
+    await database.chat_jobs.create_index([("status", 1), ("created_at", 1)])
+    await database.chat_jobs.create_index("expires_at", expireAfterSeconds=0)
 
 async def close_mongo_connection():
     global client
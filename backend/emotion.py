@@ -0,0 +1,73 @@
+import re
+from typing import Optional, Tuple
+
+EMOTION_TAG = re.compile(r"\[EMOTION:\s*([^\]]+)\]")
+EMOTION_TAG_PREFIX = "[EMOTION:"
+
+# Longest tag we are willing to hold back while waiting for its closing bracket
+MAX_TAG_LENGTH = 64
+
+
+def extract_emotion(text: str, default: Optional[str] = "neutral") -> Tuple[Optional[str], str]:
+    """
+    Split a model reply into (emotion, clean_text), with default as the
+    emotion when the reply carries no tag.
+    Format: [EMOTION: emotion_name]
+    """
+    emotion = default
+    emotion_match = EMOTION_TAG.search(text)
+    if emotion_match:
+        emotion = emotion_match.group(1).strip()
+        # Remove the emotion tag from the message
+        text = EMOTION_TAG.sub("", text).strip()
+    return emotion, text
+
+
+class EmotionTagStream:
+    """
+    Strips [EMOTION: ...] tags from text that arrives in arbitrary chunks.
+    feed() returns the text that is safe to show now; anything that could
+    still turn out to be a tag is held back until it is resolved.
+    """
+
+    def __init__(self):
+        self.emotion: Optional[str] = None
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        self._pending += chunk
+        out = []
+        while self._pending:
+            start = self._pending.find("[")
+            if start == -1:
+                out.append(self._pending)
+                self._pending = ""
+                break
+            out.append(self._pending[:start])
+            rest = self._pending[start:]
+            tag_match = EMOTION_TAG.match(rest)
+            if tag_match:
+                self.emotion = tag_match.group(1).strip()
+                self._pending = rest[tag_match.end():]
+                continue
+            if self._could_be_tag(rest):
+                self._pending = rest
+                break
+            out.append("[")
+            self._pending = rest[1:]
+        return "".join(out)
+
+    def finish(self, default: Optional[str] = "neutral") -> str:
+        """Flush whatever was held back and settle the emotion."""
+        rest, self._pending = self._pending, ""
+        if self.emotion is None:
+            self.emotion = default
+        return rest
+
+    @staticmethod
+    def _could_be_tag(text: str) -> bool:
+        if len(text) > MAX_TAG_LENGTH or "]" in text:
+            return False
+        if len(text) <= len(EMOTION_TAG_PREFIX):
+            return EMOTION_TAG_PREFIX.startswith(text)
+        return text.startswith(EMOTION_TAG_PREFIX)
@@ -0,0 +1,39 @@
+import os
+
+import httpx
+
+# Outbound HTTP pool settings (used for Groq API calls)
+HTTP_CLIENT_MAX_CONNECTIONS = int(os.getenv("HTTP_CLIENT_MAX_CONNECTIONS", "100"))
+HTTP_CLIENT_MAX_KEEPALIVE = int(os.getenv("HTTP_CLIENT_MAX_KEEPALIVE", "20"))
+HTTP_CLIENT_TIMEOUT = float(os.getenv("HTTP_CLIENT_TIMEOUT", "30"))
+HTTP_CLIENT_CONNECT_TIMEOUT = float(os.getenv("HTTP_CLIENT_CONNECT_TIMEOUT", "5"))
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "true").lower() in ("1", "true", "yes")
+
+http_client: httpx.AsyncClient = None
+
+
+def build_http_client(http2: bool = HTTP_CLIENT_HTTP2) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_CLIENT_MAX_KEEPALIVE,
+        ),
+        timeout=httpx.Timeout(HTTP_CLIENT_TIMEOUT, connect=HTTP_CLIENT_CONNECT_TIMEOUT),
+    )
+
+
+async def get_http_client():
+    return http_client
+
+
+async def open_http_client():
+    global http_client
+    http_client = build_http_client()
+
+
+async def close_http_client():
+    global http_client
+    if http_client:
+        await http_client.aclose()
+        http_client = None
@@ -0,0 +1,51 @@
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+_EMOTION_NAME = re.compile(r"[^a-z0-9_]+")
+
+
+def normalize_emotion(emotion: str) -> str:
+    """Lowercase an emotion label and make it safe to use as a field name."""
+    name = _EMOTION_NAME.sub("_", (emotion or "").strip().lower()).strip("_")
+    return name[:32] or "neutral"
+
+
+def day_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+async def record_emotion(db, user_id, emotion: str, moment: datetime = None, count: int = 1):
+    """Bump the user's daily rollup for one classified message with an $inc upsert."""
+    moment = moment or datetime.utcnow()
+    await db.emotion_daily.update_one(
+        {"user_id": user_id, "day": day_key(moment)},
+        {"$inc": {f"counts.{normalize_emotion(emotion)}": count, "total": count}},
+        upsert=True
+    )
+
+
+async def get_insights(db, user_id, days: int) -> Dict[str, Any]:
+    """Per-day emotion counts and totals over the last `days` days, read from rollups."""
+    start = day_key(datetime.utcnow() - timedelta(days=days - 1))
+    rollups = await db.emotion_daily.find(
+        {"user_id": user_id, "day": {"$gte": start}},
+        {"_id": 0, "day": 1, "counts": 1, "total": 1}
+    ).sort("day", 1).to_list(length=days)
+
+    totals = Counter()
+    series: List[Dict[str, Any]] = []
+    for rollup in rollups:
+        counts = rollup.get("counts", {})
+        totals.update(counts)
+        top = max(counts.items(), key=lambda item: item[1])[0] if counts else None
+        series.append({"day": rollup["day"], "counts": counts, "total": rollup.get("total", 0), "dominant": top})
+
+    return {
+        "days": days,
+        "totals": dict(totals),
+        "total": sum(totals.values()),
+        "dominant": totals.most_common(1)[0][0] if totals else None,
+        "series": series,
+    }
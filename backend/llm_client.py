@@ -0,0 +1,298 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import httpx
+
+from .metrics import llm_circuit_open, llm_hedged_requests, llm_retries
+
+# Deadlines for one upstream call: each attempt, and the call including retries
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "15"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "30"))
+# Retries on 429, 5xx and transport errors, with full-jitter exponential backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.25"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "4"))
+# Send a second copy of a request that is slower than this latency percentile (0 disables)
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+# Consecutive failed calls that open the circuit, and how long it stays open
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Successful attempts needed before hedging kicks in, and how many are remembered
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+
+# httpx errors that mean the call failed in transit (StreamError and InvalidURL
+# are not HTTPError subclasses)
+TRANSPORT_ERRORS = (httpx.HTTPError, httpx.StreamError, httpx.InvalidURL)
+
+DEGRADED_REPLY = (
+    "I'm having trouble connecting right now, but I'm still here for you. "
+    "Please give me a moment and try again shortly."
+)
+
+
+class UpstreamError(Exception):
+    """The upstream call failed; retryable errors may succeed on another attempt."""
+
+    def __init__(self, detail: str, status_code: Optional[int] = None, retryable: bool = True,
+                 retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class CircuitOpen(Exception):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls
+    for ``reset_timeout`` seconds. After that a single trial call is let
+    through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        llm_circuit_open.set(0)
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+            llm_circuit_open.set(1)
+
+
+class LatencyTracker:
+    """Recent successful attempt latencies, used to pick the hedging delay."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class ResilientLLMClient:
+    """
+    Chat completion calls with an overall deadline, a timeout per attempt,
+    jittered retries that honor Retry-After, optional hedging and a circuit
+    breaker. Uses the shared pooled httpx client passed to each call.
+    """
+
+    def __init__(self, url: str, attempt_timeout: float = LLM_ATTEMPT_TIMEOUT, deadline: float = LLM_DEADLINE,
+                 max_retries: int = LLM_MAX_RETRIES, base_delay: float = LLM_RETRY_BASE_DELAY,
+                 max_delay: float = LLM_RETRY_MAX_DELAY, hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.url = url
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_percentile = hedge_percentile
+        self.breaker = breaker or CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+        self.latencies = LatencyTracker()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    @staticmethod
+    def _check_status(response: httpx.Response):
+        code = response.status_code
+        if code < 400:
+            return
+        retryable = code == 429 or code >= 500
+        raise UpstreamError(f"Error from Groq API: HTTP {code}", status_code=code, retryable=retryable,
+                            retry_after=parse_retry_after(response.headers.get("retry-after")))
+
+    async def _attempt(self, client: httpx.AsyncClient, payload: Dict[str, Any], headers: Dict[str, str],
+                       timeout: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                client.post(self.url, json=payload, headers=headers, timeout=timeout), timeout
+            )
+        except asyncio.TimeoutError:
+            raise UpstreamError("Groq API timed out")
+        except TRANSPORT_ERRORS as e:
+            raise UpstreamError(f"Could not reach Groq API: {e.__class__.__name__}")
+        self._check_status(response)
+        try:
+            body = response.json()
+        except ValueError:
+            raise UpstreamError("Invalid JSON from Groq API")
+        self.latencies.add(time.perf_counter() - started)
+        return body
+
+    async def _hedged(self, client, payload, headers, timeout) -> Dict[str, Any]:
+        """Run one attempt; if it outlives the hedge delay, race a second copy against it."""
+        delay = self.latencies.percentile(self.hedge_percentile) if self.hedge_percentile else None
+        if delay is None or delay >= timeout:
+            return await self._attempt(client, payload, headers, timeout)
+        pending = {asyncio.ensure_future(self._attempt(client, payload, headers, timeout))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                llm_hedged_requests.inc()
+                pending.add(asyncio.ensure_future(self._attempt(client, payload, headers, timeout - delay)))
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _call(self, attempt_fn, deadline: Optional[float] = None):
+        """Retry loop shared by plain and streaming calls, guarded by the breaker."""
+        if not self.breaker.allow():
+            raise CircuitOpen()
+        loop = asyncio.get_running_loop()
+        if deadline is None:
+            deadline = loop.time() + self.deadline
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                result = await attempt_fn(min(self.attempt_timeout, remaining))
+            except UpstreamError as e:
+                delay = self._backoff(attempt, e.retry_after)
+                if not e.retryable:
+                    # A request we got wrong says nothing about upstream health
+                    self.breaker.record_success()
+                    raise
+                if attempt >= self.max_retries or loop.time() + delay >= deadline:
+                    self.breaker.record_failure()
+                    raise
+                llm_retries.inc()
+                attempt += 1
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Don't leave a half-open trial slot taken by a cancelled call
+                self.breaker.trial_in_flight = False
+                raise
+            except BaseException:
+                # Anything unexpected counts against upstream and frees the
+                # trial slot; otherwise a half-open breaker would never close
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def complete(self, client: httpx.AsyncClient, payload: Dict[str, Any],
+                       headers: Dict[str, str]) -> Dict[str, Any]:
+        return await self._call(lambda timeout: self._hedged(client, payload, headers, timeout))
+
+    async def open_stream(self, client: httpx.AsyncClient, payload: Dict[str, Any],
+                          headers: Dict[str, str], deadline: Optional[float] = None) -> httpx.Response:
+        """
+        Start a streamed completion, retrying until the response headers
+        arrive. The caller reads the body and must aclose() the response;
+        once tokens flow there are no more retries. Prefer stream_lines(),
+        which also holds the body to the deadline.
+        """
+        async def attempt(timeout):
+            request = client.build_request("POST", self.url, json=payload, headers=headers,
+                                           timeout=httpx.Timeout(timeout))
+            try:
+                response = await asyncio.wait_for(client.send(request, stream=True), timeout)
+            except asyncio.TimeoutError:
+                raise UpstreamError("Groq API timed out")
+            except TRANSPORT_ERRORS as e:
+                raise UpstreamError(f"Could not reach Groq API: {e.__class__.__name__}")
+            try:
+                self._check_status(response)
+            except UpstreamError:
+                await response.aclose()
+                raise
+            return response
+
+        return await self._call(attempt, deadline)
+
+    async def stream_lines(self, client: httpx.AsyncClient, payload: Dict[str, Any],
+                           headers: Dict[str, str]) -> AsyncIterator[str]:
+        """Lines of a streamed completion; the overall deadline covers the whole body, not just the headers."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        response = await self.open_stream(client, payload, headers, deadline)
+        lines = response.aiter_lines()
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(lines.__anext__(), max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    return
+                # _call already counted the open as a success, so a body that
+                # stalls or breaks off has to reach the breaker from here
+                except asyncio.TimeoutError:
+                    self.breaker.record_failure()
+                    raise UpstreamError("Groq API stream exceeded the deadline", retryable=False)
+                except TRANSPORT_ERRORS as e:
+                    self.breaker.record_failure()
+                    raise UpstreamError(f"Groq API stream broke off: {e.__class__.__name__}", retryable=False)
+                yield line
+        finally:
+            await response.aclose()
@@ -0,0 +1,301 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List
+
+from . import http_client
+from .classifier import classify
+from .llm_client import CircuitOpen, ResilientLLMClient
+from .metrics import llm_coalesced_requests, llm_request_duration, record_llm_usage
+
+# Which backend answers chat: "groq" or "stub" (deterministic, offline)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower()
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+
+# Model routing: messages up to LLM_SMALL_MODEL_MAX_CHARS go to LLM_SMALL_MODEL when it is set
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3-8b-8192")
+LLM_SMALL_MODEL = os.getenv("LLM_SMALL_MODEL") or None
+LLM_SMALL_MODEL_MAX_CHARS = int(os.getenv("LLM_SMALL_MODEL_MAX_CHARS", "160"))
+
+# Share one upstream call between concurrent identical requests
+LLM_COALESCE = os.getenv("LLM_COALESCE", "true").lower() in ("1", "true", "yes")
+
+# Simulated latency of the stub provider
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0"))
+LLM_STUB_TOKEN_DELAY = float(os.getenv("LLM_STUB_TOKEN_DELAY", "0"))
+
+
+def choose_model(user_message: str) -> str:
+    if LLM_SMALL_MODEL and len(user_message) <= LLM_SMALL_MODEL_MAX_CHARS:
+        return LLM_SMALL_MODEL
+    return LLM_MODEL
+
+
+def request_key(payload: Dict[str, Any]) -> str:
+    fields = {name: payload.get(name) for name in ("model", "messages", "temperature", "max_tokens", "stream")}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+class LLMProvider(ABC):
+    """
+    Chat completion backend. Both calls take an OpenAI-style payload;
+    complete() returns the response body and stream() yields the parsed
+    chunks of a streamed response.
+    """
+
+    name = "base"
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def complete(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def stream(self, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        ...
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, url: str, api_key: str, llm: ResilientLLMClient = None):
+        self.api_key = api_key
+        self.llm = llm or ResilientLLMClient(url)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+    async def complete(self, payload):
+        return await self.llm.complete(http_client.http_client, payload, self._headers())
+
+    async def stream(self, payload):
+        lines = self.llm.stream_lines(http_client.http_client, payload, self._headers())
+        try:
+            async for line in lines:
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data)
+        finally:
+            await lines.aclose()
+
+
+class StubProvider(LLMProvider):
+    """Deterministic offline replies, tagged with the local classifier's emotion."""
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0, token_delay: float = 0.0):
+        self.latency = latency
+        self.token_delay = token_delay
+
+    @staticmethod
+    def _reply(messages: List[Dict[str, str]]) -> str:
+        last = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        return f"I hear you. You said: {last[:200]} Let's take it one step at a time. [EMOTION: {classify(last)}]"
+
+    @staticmethod
+    def _usage(messages: List[Dict[str, str]], content: str) -> Dict[str, int]:
+        prompt_tokens = sum(len(m["content"]) // 4 for m in messages)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4}
+
+    async def complete(self, payload):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        content = self._reply(payload["messages"])
+        return {
+            "model": payload["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": self._usage(payload["messages"], content),
+        }
+
+    async def stream(self, payload):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        content = self._reply(payload["messages"])
+        for start in range(0, len(content), 6):
+            yield {"choices": [{"index": 0, "delta": {"content": content[start:start + 6]}}]}
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+        yield {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+               "usage": self._usage(payload["messages"], content)}
+
+
+class MeteredProvider(LLMProvider):
+    """
+    Records latency and token usage per upstream call. Sits underneath
+    CoalescingProvider so a call shared by many requests is counted once.
+    """
+
+    def __init__(self, provider: LLMProvider):
+        self.provider = provider
+        self.name = provider.name
+
+    @property
+    def configured(self) -> bool:
+        return self.provider.configured
+
+    async def complete(self, payload):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self.provider.complete(payload)
+            outcome = "ok"
+            record_llm_usage(payload["model"], response.get("usage"))
+            return response
+        except CircuitOpen:
+            outcome = "circuit_open"
+            raise
+        finally:
+            llm_request_duration.labels(payload["model"], "false", outcome).observe(time.perf_counter() - start)
+
+    async def stream(self, payload):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            async for chunk in self.provider.stream(payload):
+                # Groq reports usage on the final chunk under x_groq
+                record_llm_usage(payload["model"], chunk.get("usage") or chunk.get("x_groq", {}).get("usage"))
+                yield chunk
+            outcome = "ok"
+        except CircuitOpen:
+            outcome = "circuit_open"
+            raise
+        finally:
+            llm_request_duration.labels(payload["model"], "true", outcome).observe(time.perf_counter() - start)
+
+
+class _SharedStream:
+    """
+    One upstream stream fanned out to every subscriber, replaying chunks
+    they missed. The upstream read is cancelled once the last subscriber
+    has gone away.
+    """
+
+    def __init__(self, source: AsyncIterator[Dict[str, Any]]):
+        self.chunks: List[Dict[str, Any]] = []
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source):
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+            # Closes the upstream response now rather than whenever it is collected
+            await source.aclose()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self):
+        self.subscribers += 1
+        try:
+            index = 0
+            while True:
+                if index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                elif self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                else:
+                    await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self.cancelled = True
+                self.task.cancel()
+
+
+class CoalescingProvider(LLMProvider):
+    """
+    Wraps a provider so concurrent identical requests share one upstream
+    call. Only requests in flight at the same time are merged; nothing is
+    kept once the call finishes (see chat_cache for that).
+    """
+
+    def __init__(self, provider: LLMProvider):
+        self.provider = provider
+        self.name = provider.name
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _SharedStream] = {}
+
+    @property
+    def configured(self) -> bool:
+        return self.provider.configured
+
+    def _forget(self, key: str, call: asyncio.Future):
+        self._calls.pop(key, None)
+        if not call.cancelled():
+            # Mark the error as retrieved even if every caller went away
+            call.exception()
+
+    async def complete(self, payload):
+        key = request_key(payload)
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(self.provider.complete(payload))
+            call.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            llm_coalesced_requests.labels("false").inc()
+        # Shielded so one caller disconnecting does not cancel the others' call
+        return await asyncio.shield(call)
+
+    def _forget_stream(self, key: str, shared: _SharedStream):
+        # A cancelled stream may already have been replaced by a fresh one
+        if self._streams.get(key) is shared:
+            del self._streams[key]
+
+    async def stream(self, payload):
+        key = request_key(payload)
+        shared = self._streams.get(key)
+        if shared is None or shared.cancelled:
+            shared = self._streams[key] = _SharedStream(self.provider.stream(payload))
+            shared.task.add_done_callback(lambda _: self._forget_stream(key, shared))
+        else:
+            llm_coalesced_requests.labels("true").inc()
+        subscription = shared.subscribe()
+        try:
+            async for chunk in subscription:
+                yield chunk
+        finally:
+            # Unsubscribe now, not when the generator is collected
+            await subscription.aclose()
+
+
+def build_provider() -> LLMProvider:
+    if LLM_PROVIDER == "stub":
+        provider = StubProvider(LLM_STUB_LATENCY, LLM_STUB_TOKEN_DELAY)
+    else:
+        provider = GroqProvider(GROQ_API_URL, GROQ_API_KEY)
+    provider = MeteredProvider(provider)
+    return CoalescingProvider(provider) if LLM_COALESCE else provider
+
+
+llm_provider = build_provider()
@@ -1,12 +1,25 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from .routes.auth_routes import auth_router
 from .routes.note_routes import notes_router
-from .routes.chat_routes import chat_router
-from .database import connect_to_mongo, close_mongo_connection
+from .routes.chat_routes import chat_jobs, chat_router
+from .routes.admin_routes import admin_router
+from .backfill import resume_backfills, stop_backfills
+from .database import connect_to_mongo, close_mongo_connection, get_database
+from .hashing import password_hasher
+from .metrics import http_request_duration, http_requests, register_route_prefix, render_metrics, route_label
+from .profiler import ProfilingMiddleware
+from .http_client import open_http_client, close_http_client
+from .search import SEARCH_BACKEND, start_note_index, stop_note_index
 
 app = FastAPI(title="FastAuth Notes API", version="1.0.0")
 
+# Request profiler (off unless enabled via /admin/profiler); added first so it
+# is the innermost middleware and samples the task running the handler
+app.add_middleware(ProfilingMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -16,18 +29,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        labels = (request.method, route_label(request.scope), str(status_code))
+        http_requests.labels(*labels).inc()
+        http_request_duration.labels(*labels).observe(time.perf_counter() - start)
+
 # Include routers
-app.include_router(auth_router, prefix="/auth", tags=["authentication"])
-app.include_router(notes_router, prefix="/notes", tags=["notes"])
-app.include_router(chat_router, prefix="/emotional-chat", tags=["chat"])
+for router, prefix, tag in (
+    (auth_router, "/auth", "authentication"),
+    (notes_router, "/notes", "notes"),
+    (chat_router, "/emotional-chat", "chat"),
+    (admin_router, "/admin", "admin"),
+):
+    app.include_router(router, prefix=prefix, tags=[tag])
+    # So metrics and profiles label routes with their full path
+    register_route_prefix(router, prefix)
 
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    await open_http_client()
+    if SEARCH_BACKEND == "memory":
+        await start_note_index(await get_database())
+    await resume_backfills(await get_database())
+    chat_jobs.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if SEARCH_BACKEND == "memory":
+        stop_note_index()
+    await stop_backfills(await get_database())
+    await chat_jobs.shutdown()
     await close_mongo_connection()
+    await close_http_client()
+    password_hasher.shutdown()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
 @app.get("/")
 async def root():
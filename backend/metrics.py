@@ -0,0 +1,113 @@
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from pymongo import monitoring
+
+# Latency buckets in seconds, from sub-millisecond Mongo reads to slow LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time until the response headers are sent",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+mongo_command_duration = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command round trip time",
+    ["collection", "command", "outcome"], buckets=LATENCY_BUCKETS
+)
+llm_request_duration = Histogram(
+    "llm_request_duration_seconds", "Upstream chat completion latency (full body for streams)",
+    ["model", "stream", "outcome"], buckets=LATENCY_BUCKETS
+)
+llm_tokens = Counter(
+    "llm_tokens_total", "Tokens reported by the upstream chat API", ["model", "kind"]
+)
+llm_retries = Counter("llm_retries_total", "Upstream chat attempts retried")
+llm_hedged_requests = Counter("llm_hedged_requests_total", "Hedged second attempts sent upstream")
+llm_circuit_open = Gauge("llm_circuit_open", "1 while the upstream circuit breaker is open")
+llm_coalesced_requests = Counter(
+    "llm_coalesced_requests_total", "Chat requests that joined an identical call already in flight", ["stream"]
+)
+llm_degraded_replies = Counter("llm_degraded_replies_total", "Canned replies served while upstream was unavailable")
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "bcrypt time spent in the worker, excluding queueing",
+    ["operation"], buckets=LATENCY_BUCKETS
+)
+
+rate_limited = Counter(
+    "rate_limited_total", "Requests rejected by admission control", ["limit"]
+)
+
+websocket_connections = Gauge("websocket_connections", "Open chat WebSocket connections in this process")
+websocket_slow_consumers = Counter(
+    "websocket_slow_consumers_total", "Chat WebSockets closed because the client stopped reading"
+)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# Full templated path of each route, keyed by id() of the route object
+_route_paths: Dict[int, str] = {}
+
+
+def register_route_prefix(router, prefix: str):
+    """
+    Remember the prefix a router is included under. Newer FastAPI keeps the
+    router's own route in scope["route"], whose path lacks the prefix, so
+    /auth/cache-stats and /emotional-chat/cache-stats would share a label.
+    """
+    for route in router.routes:
+        _route_paths[id(route)] = prefix + route.path
+
+
+def route_label(scope) -> str:
+    """Templated route path, so /notes/{note_id} is one series, not one per note."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return scope.get("root_path", "") + _route_paths.get(id(route), getattr(route, "path", "unmatched"))
+
+
+def record_llm_usage(model: str, usage: Optional[Dict]):
+    if not usage:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            llm_tokens.labels(model, kind[:-len("_tokens")]).inc(usage[kind])
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Times every command sent by the driver. Succeeded/failed events only
+    carry the request id, so the collection is remembered on start.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple, str] = {}
+
+    @staticmethod
+    def _key(event):
+        return event.connection_id, event.request_id
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        self._pending[self._key(event)] = target if isinstance(target, str) else event.database_name
+
+    def _observe(self, event, outcome: str):
+        collection = self._pending.pop(self._key(event), "unknown")
+        mongo_command_duration.labels(collection, event.command_name, outcome).observe(
+            event.duration_micros / 1e6
+        )
+
+    def succeeded(self, event):
+        self._observe(event, "ok")
+
+    def failed(self, event):
+        self._observe(event, "error")
+
@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_value: datetime, doc_id: ObjectId) -> str:
+    """Build an opaque cursor pointing just past (sort_value, doc_id)."""
+    raw = json.dumps({"t": sort_value.isoformat(), "id": str(doc_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["t"]), ObjectId(data["id"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_filter(base: Dict[str, Any], field: str, cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Extend a query so it only matches documents after the cursor when
+    sorting by (field, _id) descending.
+    """
+    if not cursor:
+        return base
+    sort_value, doc_id = decode_cursor(cursor)
+    return {
+        **base,
+        "$or": [
+            {field: {"$lt": sort_value}},
+            {field: sort_value, "_id": {"$lt": doc_id}},
+        ],
+    }
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .metrics import route_label
+
+# Opt-in request profiler; everything here can be changed at runtime via /admin/profiler
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0.01"))
+PROFILER_ROUTE = os.getenv("PROFILER_ROUTE") or None
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_OUTPUT_DIR = os.getenv("PROFILER_OUTPUT_DIR", "profiles")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _awaiting_stack(coro) -> List[str]:
+    """Follow a suspended coroutine's await chain down to what it is waiting on."""
+    labels = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            # A future or other awaitable: the request is waiting on I/O or a worker pool
+            name = type(coro).__name__
+            labels.append(f"[await {'Future' if name == 'FutureIter' else name}]")
+            break
+        labels.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return labels
+
+
+def _running_stack(frame, root) -> List[str]:
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    # Drop event loop internals above the request's own coroutine
+    for index, candidate in enumerate(frames):
+        if candidate is root:
+            frames = frames[index:]
+            break
+    return [_frame_label(f) for f in frames]
+
+
+class _ProfiledRequest:
+    def __init__(self, task: asyncio.Task, thread_id: int):
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+
+
+class RequestProfiler:
+    """
+    Wall-clock sampling profiler for individual requests. A background
+    thread wakes every interval and records the stack of each profiled
+    request's task: the live Python stack while it runs on the event loop,
+    or its await chain while it is suspended. Suspended samples end in an
+    "[await ...]" frame, which separates waiting on Mongo or the bcrypt pool
+    from CPU time on the loop. Stacks are aggregated in collapsed format
+    ("frame;frame;frame count") ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 0.01, route: Optional[str] = None,
+                 interval_ms: float = 5.0, output_dir: str = "profiles"):
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.route = route
+        self.interval_ms = interval_ms
+        self.output_dir = output_dir
+        self.requests_profiled = 0
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._active: Dict[int, _ProfiledRequest] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        if enabled:
+            self.configure(enabled=True)
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  route: Optional[str] = None, interval_ms: Optional[float] = None):
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if route is not None:
+            self.route = route or None
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+        if enabled is not None:
+            self.enabled = enabled
+        if self.enabled and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def should_profile(self, scope) -> bool:
+        if not self.enabled:
+            return False
+        if self.route is not None and scope["path"] != self.route:
+            return False
+        return random.random() < self.sample_rate
+
+    def begin(self) -> _ProfiledRequest:
+        request = _ProfiledRequest(asyncio.current_task(), threading.get_ident())
+        with self._lock:
+            self._active[id(request)] = request
+        return request
+
+    def end(self, request: _ProfiledRequest, label: str):
+        with self._lock:
+            self._active.pop(id(request), None)
+            for stack, count in request.stacks.items():
+                self._stacks[f"{label};{stack}"] += count
+            self.requests_profiled += 1
+
+    def _sample(self, request: _ProfiledRequest, thread_frames) -> Optional[str]:
+        coro = request.task.get_coro()
+        if asyncio.current_task(request.loop) is request.task:
+            frame = thread_frames.get(request.thread_id)
+            labels = _running_stack(frame, getattr(coro, "cr_frame", None)) if frame is not None else []
+        else:
+            labels = _awaiting_stack(coro)
+        return ";".join(labels) or None
+
+    def _run(self):
+        while self.enabled:
+            time.sleep(self.interval_ms / 1000)
+            with self._lock:
+                requests = list(self._active.values())
+            if not requests:
+                continue
+            thread_frames = sys._current_frames()
+            for request in requests:
+                try:
+                    stack = self._sample(request, thread_frames)
+                except (RuntimeError, ValueError):
+                    # The request finished or moved on while we were walking it
+                    continue
+                if stack:
+                    with self._lock:
+                        request.stacks[stack] += 1
+                        self.samples += 1
+
+    def dump(self) -> Dict[str, Any]:
+        """Write the collected stacks to a collapsed-stack file and start afresh."""
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+            samples, self.samples = self.samples, 0
+            requests, self.requests_profiled = self.requests_profiled, 0
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"requests-{datetime.utcnow():%Y%m%dT%H%M%S}.collapsed")
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return {"path": path, "requests": requests, "samples": samples, "stacks": len(stacks)}
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "route": self.route,
+            "interval_ms": self.interval_ms,
+            "output_dir": self.output_dir,
+            "active_requests": len(self._active),
+            "requests_profiled": self.requests_profiled,
+            "samples": self.samples,
+        }
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles sampled requests. It must be the innermost
+    middleware so the task it records is the one running the route handler.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not request_profiler.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        request = request_profiler.begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_profiler.end(request, f"{scope['method']} {route_label(scope)}")
+
+
+request_profiler = RequestProfiler(
+    enabled=PROFILER_ENABLED,
+    sample_rate=PROFILER_SAMPLE_RATE,
+    route=PROFILER_ROUTE,
+    interval_ms=PROFILER_INTERVAL_MS,
+    output_dir=PROFILER_OUTPUT_DIR,
+)
@@ -0,0 +1,228 @@
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from starlette.requests import HTTPConnection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from .auth import get_current_active_user
+from .database import get_database
+from .metrics import rate_limited
+
+# Limiter store: "off", "memory" (per worker) or "mongo" (shared by all workers)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+# Use the first X-Forwarded-For address as the client IP (only behind a trusted proxy)
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() in ("1", "true", "yes")
+
+# Limits as "<requests>/<seconds>"; an empty value or "0" disables that bucket
+RATE_LIMIT_LOGIN_PER_IP = os.getenv("RATE_LIMIT_LOGIN_PER_IP", "30/60")
+RATE_LIMIT_LOGIN_PER_USER = os.getenv("RATE_LIMIT_LOGIN_PER_USER", "10/60")
+RATE_LIMIT_CHAT_PER_IP = os.getenv("RATE_LIMIT_CHAT_PER_IP", "120/60")
+RATE_LIMIT_CHAT_PER_USER = os.getenv("RATE_LIMIT_CHAT_PER_USER", "30/60")
+# Chat calls a single user may have waiting on the LLM at once (0 disables)
+CHAT_MAX_IN_FLIGHT_PER_USER = int(os.getenv("CHAT_MAX_IN_FLIGHT_PER_USER", "2"))
+
+# In-flight slots left behind by a crashed worker expire after this long
+IN_FLIGHT_TTL_SECONDS = 300
+
+
+def parse_rate(text: Optional[str]) -> Optional[Tuple[int, float]]:
+    """Parse "<requests>/<seconds>" into (capacity, period); None when disabled."""
+    if not text or text.strip() == "0":
+        return None
+    capacity, _, period = text.partition("/")
+    return int(capacity), float(period or 1)
+
+
+class MemoryLimiterBackend:
+    """
+    Token buckets refilled lazily on access, plus in-flight counters. State
+    is per process, so each uvicorn worker enforces the limits on its own.
+    """
+
+    def __init__(self, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> (tokens, last refill, time at which the bucket is full again)
+        self.buckets: Dict[str, Tuple[float, float, float]] = {}
+        self.in_flight: Dict[str, int] = {}
+
+    def _prune(self, now: float):
+        # Buckets that have refilled completely carry no state worth keeping
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if bucket[2] > now}
+
+    async def take(self, key: str, capacity: int, period: float) -> float:
+        """Take one token; returns 0 when allowed, else seconds until a token is available."""
+        now = self.clock()
+        refill = capacity / period
+        tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        if key not in self.buckets and len(self.buckets) >= self.max_keys:
+            self._prune(now)
+        self.buckets[key] = (tokens, now, now + (capacity - tokens) / refill)
+        return 0.0 if allowed else (1 - tokens) / refill
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        count = self.in_flight.get(key, 0)
+        if count >= limit:
+            return False
+        self.in_flight[key] = count + 1
+        return True
+
+    async def release_slot(self, key: str):
+        count = self.in_flight.get(key, 0) - 1
+        if count > 0:
+            self.in_flight[key] = count
+        else:
+            self.in_flight.pop(key, None)
+
+
+class MongoLimiterBackend:
+    """
+    Shared limits in the rate_limits collection. Rates are enforced with
+    fixed-window counters (one document per key and window, bumped with an
+    atomic $inc) and the documents are removed by a TTL index on expires_at.
+    """
+
+    def __init__(self, get_db):
+        self.get_db = get_db
+
+    async def take(self, key: str, capacity: int, period: float) -> float:
+        db = await self.get_db()
+        now = time.time()
+        window = int(now // period)
+        window_end = (window + 1) * period
+        doc = await db.rate_limits.find_one_and_update(
+            {"_id": f"{key}:{window}"},
+            {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": datetime.utcfromtimestamp(window_end)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return 0.0 if doc["count"] <= capacity else window_end - now
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        db = await self.get_db()
+        # The filter only matches while under the limit; at the limit the
+        # upsert collides with the existing document instead
+        for _ in range(2):
+            try:
+                await db.rate_limits.update_one(
+                    {"_id": key, "count": {"$lt": limit}},
+                    {"$inc": {"count": 1},
+                     "$set": {"expires_at": datetime.utcnow() + timedelta(seconds=IN_FLIGHT_TTL_SECONDS)}},
+                    upsert=True
+                )
+                return True
+            except DuplicateKeyError:
+                continue
+        return False
+
+    async def release_slot(self, key: str):
+        db = await self.get_db()
+        await db.rate_limits.update_one({"_id": key, "count": {"$gt": 0}}, {"$inc": {"count": -1}})
+
+
+def build_limiter_backend(get_db):
+    if RATE_LIMIT_BACKEND == "memory":
+        return MemoryLimiterBackend()
+    if RATE_LIMIT_BACKEND == "mongo":
+        return MongoLimiterBackend(get_db)
+    return None
+
+
+limiter_backend = build_limiter_backend(get_database)
+
+
+def client_ip(request: HTTPConnection) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def enforce(limit: str, key: str, rate: Optional[Tuple[int, float]]):
+    """Take a token from the named bucket or raise 429 with Retry-After."""
+    if limiter_backend is None or rate is None:
+        return
+    retry_after = await limiter_backend.take(f"{limit}:{key}", *rate)
+    if retry_after > 0:
+        rate_limited.labels(limit).inc()
+        raise _too_many_requests("Too many requests, please slow down", retry_after)
+
+
+class InFlightSlot:
+    """A held in-flight slot. Streaming routes detach it and release it when the stream ends."""
+
+    def __init__(self, key: Optional[str]):
+        self.key = key
+        self.detached = False
+
+    def detach(self) -> "InFlightSlot":
+        self.detached = True
+        return self
+
+    async def release(self):
+        if self.key is not None:
+            key, self.key = self.key, None
+            await limiter_backend.release_slot(key)
+
+
+_login_ip_rate = parse_rate(RATE_LIMIT_LOGIN_PER_IP)
+_login_user_rate = parse_rate(RATE_LIMIT_LOGIN_PER_USER)
+_chat_ip_rate = parse_rate(RATE_LIMIT_CHAT_PER_IP)
+_chat_user_rate = parse_rate(RATE_LIMIT_CHAT_PER_USER)
+
+
+async def limit_login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    """Admission control for /auth/login, per client IP and per attempted username."""
+    await enforce("login_ip", client_ip(request), _login_ip_rate)
+    await enforce("login_user", form_data.username.lower(), _login_user_rate)
+
+
+async def limit_chat_message(connection: HTTPConnection, user_id: str):
+    """Per-IP and per-user chat rates, checked for each message on a chat WebSocket too."""
+    await enforce("chat_ip", client_ip(connection), _chat_ip_rate)
+    await enforce("chat_user", user_id, _chat_user_rate)
+
+
+async def acquire_chat_slot(user_id: str) -> InFlightSlot:
+    """Take one of the user's in-flight chat slots (429 if none is free); release() it when the turn ends."""
+    if limiter_backend is None or CHAT_MAX_IN_FLIGHT_PER_USER <= 0:
+        return InFlightSlot(None)
+    key = f"chat_in_flight:{user_id}"
+    if not await limiter_backend.acquire_slot(key, CHAT_MAX_IN_FLIGHT_PER_USER):
+        rate_limited.labels("chat_in_flight").inc()
+        raise _too_many_requests("Too many chat requests in progress", 1)
+    return InFlightSlot(key)
+
+
+async def limit_chat(request: Request, current_user: Dict[str, Any] = Depends(get_current_active_user)):
+    """
+    Admission control for chat: per-IP and per-user rates, then one of the
+    user's in-flight slots, held until the handler (or its stream) finishes.
+    """
+    user_id = str(current_user["_id"])
+    await limit_chat_message(request, user_id)
+    slot = await acquire_chat_slot(user_id)
+    try:
+        yield slot
+    finally:
+        if not slot.detached:
+            await slot.release()
@@ -1,139 +0,0 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-
-from .database import get_db
-from .auth import (
-    authenticate_user, create_access_token, get_current_active_user,
-    create_password_reset_token, reset_password
-)
-from .models import User, Note
-from datetime import timedelta
-
-router = APIRouter()
-
-
-class UserCreate(BaseModel):
-    username: str
-    email: EmailStr
-    password: str
-
-
-class UserResponse(BaseModel):
-    id: int
-    username: str
-    email: str
-
-
-class NoteCreate(BaseModel):
-    title: str
-    content: str
-
-
-class NoteResponse(BaseModel):
-    id: int
-    title: str
-    content: str
-    owner_id: int
-
-
-class Token(BaseModel):
-    access_token: str
-    token_type: str
-
-
-class ForgotPasswordRequest(BaseModel):
-    email: EmailStr
-
-
-class ResetPasswordRequest(BaseModel):
-    token: str
-    password: str
-
-
-class MessageResponse(BaseModel):
-    message: str
-
-
-@router.post("/register", response_model=UserResponse)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    # Check if username already exists
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
-    
-    # Check if email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Create new user
-    from .auth import get_password_hash
-    hashed_password = get_password_hash(user.password)
-    db_user = User(username=user.username, email=user.email, hashed_password=hashed_password)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
-
-
-@router.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    access_token_expires = timedelta(minutes=30)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
-
-
-@router.get("/users/me", response_model=UserResponse)
-async def read_users_me(current_user = Depends(get_current_active_user)):
-    return current_user
-
-
-@router.post("/notes", response_model=NoteResponse)
-async def create_note(note: NoteCreate, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
-    db_note = Note(**note.dict(), owner_id=current_user.id)
-    db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
-    return db_note
-
-
-@router.get("/notes", response_model=list[NoteResponse])
-async def read_notes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user = Depends(get_current_active_user)):
-    notes = db.query(Note).filter(Note.owner_id == current_user.id).offset(skip).limit(limit).all()
-    return notes
-
-
-@router.post("/auth/forgot-password", response_model=MessageResponse)
-async def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db)):
-    token = create_password_reset_token(request.email, db)
-    
-    # In a real application, you would send an email with the reset link
-    # For this example, we'll just return a success message
-    # The email would contain a link like: https://yourapp.com/reset-password?token={token}
-    
-    return {"message": "If your email is registered, you will receive a password reset link"}
-
-
-@router.post("/auth/reset-password", response_model=MessageResponse)
-async def reset_user_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
-    success = reset_password(request.token, request.password, db)
-    
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid or expired token"
-        )
-    
-    return {"message": "Password has been reset successfully"}
\ No newline at end of file
@@ -0,0 +1,125 @@
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+from ..auth import disable_user, get_current_admin_user
+from ..backfill import BackfillClaimed, backfill_jobs
+from ..database import get_database
+from ..profiler import request_profiler
+
+admin_router = APIRouter()
+
+
+class BackfillOptions(BaseModel):
+    batch_size: Optional[int] = None
+    concurrency: Optional[int] = None
+    max_docs_per_second: Optional[float] = None
+
+
+class ProfilerSettings(BaseModel):
+    enabled: bool
+    sample_rate: Optional[float] = None
+    # Exact request path to profile, e.g. /notes/; an empty string clears it
+    route: Optional[str] = None
+    interval_ms: Optional[float] = None
+
+
+def _get_job(target: str):
+    job = backfill_jobs.get(target)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown backfill target")
+    return job
+
+
+def _claimed_elsewhere():
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Backfill is already running in another worker process"
+    )
+
+
+@admin_router.get("/backfill")
+async def backfill_status(
+    current_user: Dict[str, Any] = Depends(get_current_admin_user),
+    db=Depends(get_database)
+):
+    """Progress and throughput of every emotion backfill."""
+    for job in backfill_jobs.values():
+        if not job.running:
+            await job.load(db)
+    return {target: job.progress() for target, job in backfill_jobs.items()}
+
+
+@admin_router.post("/backfill/{target}/start")
+async def start_backfill(
+    target: str,
+    options: BackfillOptions = BackfillOptions(),
+    current_user: Dict[str, Any] = Depends(get_current_admin_user),
+    db=Depends(get_database)
+):
+    job = _get_job(target)
+    for name, value in options.dict().items():
+        if value is not None and value <= 0:
+            raise HTTPException(status_code=400, detail=f"{name} must be positive")
+    try:
+        await job.start(db, options.batch_size, options.concurrency, options.max_docs_per_second)
+    except BackfillClaimed:
+        raise _claimed_elsewhere()
+    return job.progress()
+
+
+@admin_router.post("/backfill/{target}/stop")
+async def stop_backfill(
+    target: str,
+    current_user: Dict[str, Any] = Depends(get_current_admin_user),
+    db=Depends(get_database)
+):
+    job = _get_job(target)
+    try:
+        await job.stop(db)
+    except BackfillClaimed:
+        raise _claimed_elsewhere()
+    return job.progress()
+
+
+@admin_router.get("/profiler")
+async def profiler_status(current_user: Dict[str, Any] = Depends(get_current_admin_user)):
+    return request_profiler.status()
+
+
+@admin_router.post("/profiler")
+async def configure_profiler(
+    settings: ProfilerSettings,
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """Turn request profiling on or off for this worker process."""
+    if settings.sample_rate is not None and not 0 <= settings.sample_rate <= 1:
+        raise HTTPException(status_code=400, detail="sample_rate must be between 0 and 1")
+    if settings.interval_ms is not None and settings.interval_ms <= 0:
+        raise HTTPException(status_code=400, detail="interval_ms must be positive")
+    request_profiler.configure(settings.enabled, settings.sample_rate, settings.route, settings.interval_ms)
+    return request_profiler.status()
+
+
+@admin_router.post("/profiler/dump")
+async def dump_profile(current_user: Dict[str, Any] = Depends(get_current_admin_user)):
+    """Write the samples collected so far to a collapsed-stack file."""
+    return request_profiler.dump()
+
+
+@admin_router.post("/users/{user_id}/disable")
+async def disable_account(
+    user_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_admin_user),
+    db=Depends(get_database)
+):
+    """Disable an account; its tokens stop working (see disable_user for the multi-worker caveat)."""
+    try:
+        user_oid = ObjectId(user_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    if not await disable_user(db, user_oid):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return {"id": user_id, "disabled": True}
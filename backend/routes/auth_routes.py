@@ -6,9 +6,10 @@ from typing import Optional
 
 from ..auth import (
     authenticate_user, create_access_token, get_current_active_user,
-    create_user, get_user_by_email
+    get_current_admin_user, create_user, get_user_by_email, user_cache
 )
 from ..database import get_database
+from ..rate_limit import limit_login
 
 auth_router = APIRouter()
 
@@ -48,7 +49,8 @@ async def register_user(user: UserCreate, db=Depends(get_database)):
 
 
 @auth_router.post("/login", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_database)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_database),
+                                 _=Depends(limit_login)):
     user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -69,4 +71,10 @@ async def read_users_me(current_user=Depends(get_current_active_user)):
         "id": str(current_user["_id"]),
         "username": current_user["username"],
         "email": current_user["email"]
-    }
\ No newline at end of file
+    }
+
+
+@auth_router.get("/cache-stats")
+async def read_user_cache_stats(current_user=Depends(get_current_admin_user)):
+    """Hit/miss counters for the token-to-user cache (admins only)"""
+    return user_cache.stats()
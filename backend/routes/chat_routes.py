@@ -1,17 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-import httpx
-import os
+import asyncio
+import json
+from datetime import datetime
 from typing import List, Optional
 
-from ..auth import get_current_active_user
+from ..auth import authenticate_token, get_current_active_user, get_current_admin_user
+from ..chat_cache import build_completion_cache, cache_key
+from ..chat_jobs import FINISHED, QueueFull, build_job_queue
+from ..classifier import classify
+from ..context_window import fit_to_budget
 from ..database import get_database
+from ..emotion import EmotionTagStream, extract_emotion
+from ..insights import get_insights, record_emotion
+from ..llm_client import DEGRADED_REPLY, CircuitOpen, UpstreamError
+from ..llm_providers import choose_model, llm_provider
+from ..metrics import llm_degraded_replies, websocket_connections, websocket_slow_consumers
+from ..pagination import encode_cursor, keyset_filter
+from ..rate_limit import acquire_chat_slot, limit_chat, limit_chat_message
+from ..sessions import append_turn, create_session, load_session_context, parse_session_id, slide_context
+from ..streaming import ndjson_response
+from ..websocket_sender import WS_IDLE_TIMEOUT, ClientGone, FrameSender, SlowConsumer
 
 chat_router = APIRouter()
 
-# Get Groq API key from environment variables
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+# Characters of the last message shown in conversation listings
+CONVERSATION_PREVIEW_LENGTH = 120
+
+# How long the job WebSocket waits between checks on a job that is still running
+JOB_SOCKET_WAIT_SECONDS = 15
+
+# Optional exact-match cache of completions (see CHAT_CACHE_BACKEND)
+completion_cache = build_completion_cache(get_database)
 
 
 class ChatMessage(BaseModel):
@@ -22,45 +47,71 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     conversation_history: Optional[List[ChatMessage]] = []
+    # When set, history is loaded server-side and the client history is ignored
+    session_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
     message: str
     emotion: str
+    # True when upstream was unavailable and a canned reply was returned
+    degraded: bool = False
 
 
-@chat_router.post("/chat", response_model=ChatResponse)
-async def emotional_chat(request: ChatRequest, current_user=Depends(get_current_active_user)):
-    if not GROQ_API_KEY:
+SYSTEM_PROMPT = (
+    "You are an emotionally intelligent assistant. Analyze the user's message for emotional tone and respond appropriately. "
+    "Include an emotion tag at the end of your response in the format [EMOTION: emotion_name]. "
+    "Be empathetic and supportive."
+)
+
+
+def _require_api_key():
+    if not llm_provider.configured:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Groq API key not configured"
         )
-    
+
+
+def build_messages(request: ChatRequest, history=None, summary: Optional[str] = None) -> List[ChatMessage]:
     # Prepare conversation history
-    messages = request.conversation_history.copy() if request.conversation_history else []
+    if history is not None:
+        messages = [ChatMessage(role=msg["role"], content=msg["content"]) for msg in history]
+    else:
+        messages = request.conversation_history.copy() if request.conversation_history else []
     
     # Add system message for emotional awareness
     if not any(msg.role == "system" for msg in messages):
-        system_message = ChatMessage(
-            role="system",
-            content="You are an emotionally intelligent assistant. Analyze the user's message for emotional tone and respond appropriately. "
-                    "Include an emotion tag at the end of your response in the format [EMOTION: emotion_name]. "
-                    "Be empathetic and supportive."
-        )
-        messages.append(system_message)
+        messages.append(ChatMessage(role="system", content=SYSTEM_PROMPT))
     
     # Add user's current message
     messages.append(ChatMessage(role="user", content=request.message))
     
-    # Prepare the request to Groq API
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
+    # Keep the prompt within the model's context window
+    messages, _ = fit_to_budget(messages, ChatMessage, previous_summary=summary)
+    return messages
+
+
+async def _prepare_chat(request: ChatRequest, current_user, db):
+    """Build the prompt, loading session history if the request names one"""
+    if not request.session_id:
+        return build_messages(request), None
+    session_id = parse_session_id(request.session_id)
+    history, summary = await load_session_context(db, session_id, current_user["_id"])
+    return build_messages(request, history, summary), (session_id, summary)
+
+
+async def _record_turn(db, session, current_user, request: ChatRequest, result):
+    await record_emotion(db, current_user["_id"], result["emotion"])
+    if session is not None:
+        session_id, summary = session
+        await append_turn(db, session_id, current_user["_id"], request.message, result, summary)
+
+
+def _llm_request(messages: List[ChatMessage], stream: bool = False):
     payload = {
-        "model": "llama3-8b-8192",  # Using Llama 3 model
+        # Short messages may be routed to a smaller model (see LLM_SMALL_MODEL)
+        "model": choose_model(messages[-1].content),
         "messages": [{
             "role": msg.role,
             "content": msg.content
@@ -68,40 +119,373 @@ async def emotional_chat(request: ChatRequest, current_user=Depends(get_current_
         "temperature": 0.7,
         "max_tokens": 800
     }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def _degraded_reply(user_message: str):
+    """Canned reply served while the circuit breaker is open; never cached or saved"""
+    llm_degraded_replies.inc()
+    return {"message": DEGRADED_REPLY, "emotion": classify(user_message), "degraded": True}
+
+
+def _upstream_failed(e: UpstreamError) -> HTTPException:
+    headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after else None
+    return HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e), headers=headers)
+
+
+def _cache_key(payload, current_user) -> str:
+    return cache_key(payload["messages"], payload["model"], payload["temperature"], current_user["_id"])
+
+
+async def _complete_chat(request: ChatRequest, current_user, db):
+    """One non-streamed chat turn: cache lookup, upstream call and recording"""
+    messages, session = await _prepare_chat(request, current_user, db)
+    payload = _llm_request(messages)
+    
+    key = _cache_key(payload, current_user)
+    cached = await completion_cache.get(key)
+    if cached is not None:
+        await _record_turn(db, session, current_user, request, cached)
+        return cached
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(GROQ_API_URL, json=payload, headers=headers)
-            response.raise_for_status()
-            response_data = response.json()
-            
-            # Extract the assistant's message
-            assistant_message = response_data["choices"][0]["message"]["content"]
-            
-            # Extract emotion tag if present
-            emotion = "neutral"
-            import re
-            emotion_match = re.search(r"\[EMOTION:\s*([^\]]+)\]", assistant_message)
-            if emotion_match:
-                emotion = emotion_match.group(1).strip()
-                # Remove the emotion tag from the message
-                assistant_message = re.sub(r"\[EMOTION:\s*[^\]]+\]", "", assistant_message).strip()
-            
-            return {
-                "message": assistant_message,
-                "emotion": emotion
-            }
-    
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error from Groq API: {str(e)}"
-        )
+        response_data = await llm_provider.complete(payload)
+        
+        # Extract the assistant's message and its emotion tag, classifying
+        # the user's message locally if the model left the tag out
+        emotion, assistant_message = extract_emotion(response_data["choices"][0]["message"]["content"], default=None)
+        if emotion is None:
+            emotion = classify(request.message)
+        
+        result = {
+            "message": assistant_message,
+            "emotion": emotion
+        }
+        await completion_cache.set(key, result)
+    
+    except CircuitOpen:
+        return _degraded_reply(request.message)
+    except UpstreamError as e:
+        raise _upstream_failed(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process chat: {str(e)}"
         )
+    
+    await _record_turn(db, session, current_user, request, result)
+    return result
+
+
+@chat_router.post("/chat", response_model=ChatResponse)
+async def emotional_chat(request: ChatRequest, current_user=Depends(get_current_active_user), db=Depends(get_database),
+                         _=Depends(limit_chat)):
+    _require_api_key()
+    return await _complete_chat(request, current_user, db)
+
+
+async def _run_chat_job(current_user, request_data):
+    return await _complete_chat(ChatRequest(**request_data), current_user, await get_database())
+
+
+# Worker pool for asynchronous chat (see CHAT_JOB_BACKEND and CHAT_JOB_WORKERS)
+chat_jobs = build_job_queue(get_database, _run_chat_job)
+
+
+class ChatJob(BaseModel):
+    job_id: str
+    status: str
+    result: Optional[ChatResponse] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+
+def _job_response(job) -> dict:
+    return {
+        "job_id": str(job["_id"]),
+        "status": job["status"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "status_code": job.get("status_code")
+    }
+
+
+def _parse_job_id(job_id: str) -> ObjectId:
+    try:
+        return ObjectId(job_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+
+@chat_router.post("/jobs", response_model=ChatJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_chat_job(request: ChatRequest, current_user=Depends(get_current_active_user),
+                          db=Depends(get_database), _=Depends(limit_chat)):
+    """Queue a /chat request and return its job id at once; fetch the result via GET or the job WebSocket"""
+    _require_api_key()
+    if request.session_id:
+        # Reject a bad session id now rather than in the worker
+        parse_session_id(request.session_id)
+    try:
+        job = await chat_jobs.submit(current_user, request.dict())
+    except QueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Chat queue is full",
+            headers={"Retry-After": "1"}
+        )
+    return _job_response(job)
+
+
+@chat_router.get("/jobs/{job_id}", response_model=ChatJob)
+async def read_chat_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=30),
+    current_user=Depends(get_current_active_user)
+):
+    """Job status and, once done, its result; wait > 0 long-polls up to that many seconds"""
+    job_oid = _parse_job_id(job_id)
+    if wait:
+        job = await chat_jobs.wait(job_oid, current_user["_id"], wait)
+    else:
+        job = await chat_jobs.get(job_oid, current_user["_id"])
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return _job_response(job)
+
+
+@chat_router.websocket("/jobs/{job_id}/ws")
+async def chat_job_socket(websocket: WebSocket, job_id: str, token: str = Query(...)):
+    """Sends the job's final state as one JSON message, then closes"""
+    try:
+        current_user = await authenticate_token(token, await get_database())
+        job_oid = _parse_job_id(job_id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    try:
+        job = await chat_jobs.get(job_oid, current_user["_id"])
+        while job is not None and job["status"] not in FINISHED:
+            job = await chat_jobs.wait(job_oid, current_user["_id"], JOB_SOCKET_WAIT_SECONDS)
+        if job is None:
+            await websocket.send_json({"job_id": job_id, "status": "not_found"})
+        else:
+            await websocket.send_json(jsonable_encoder(ChatJob(**_job_response(job))))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_chat(payload, key, user_message, on_complete, slot):
+    """Relay upstream tokens as SSE, ending with an emotion (or error) event"""
+    try:
+        async for event, data in _relay_chat(payload, key, user_message, on_complete):
+            yield _sse(event, data)
+    finally:
+        # The in-flight slot is held for the whole stream, not just the handler
+        await slot.release()
+
+
+async def _relay_chat(payload, key, user_message, on_complete):
+    """Yield (event, data) pairs: token events, then one emotion or error event"""
+    cached = await completion_cache.get(key)
+    if cached is not None:
+        await on_complete(cached)
+        yield "token", {"text": cached["message"]}
+        yield "emotion", cached
+        return
+    
+    tags = EmotionTagStream()
+    parts = []
+    try:
+        async for chunk in llm_provider.stream(payload):
+            if not chunk.get("choices"):
+                continue
+            delta = chunk["choices"][0].get("delta", {}).get("content")
+            if not delta:
+                continue
+            text = tags.feed(delta)
+            if text:
+                parts.append(text)
+                yield "token", {"text": text}
+    except CircuitOpen:
+        result = _degraded_reply(user_message)
+        yield "token", {"text": result["message"]}
+        yield "emotion", result
+        return
+    except UpstreamError as e:
+        yield "error", {"detail": str(e)}
+        return
+    except Exception as e:
+        yield "error", {"detail": f"Failed to process chat: {str(e)}"}
+        return
+    
+    text = tags.finish(default=None)
+    if tags.emotion is None:
+        tags.emotion = classify(user_message)
+    if text:
+        parts.append(text)
+        yield "token", {"text": text}
+    result = {"message": "".join(parts).strip(), "emotion": tags.emotion}
+    await completion_cache.set(key, result)
+    await on_complete(result)
+    yield "emotion", result
+
+
+@chat_router.post("/chat/stream")
+async def emotional_chat_stream(request: ChatRequest, current_user=Depends(get_current_active_user),
+                                db=Depends(get_database), slot=Depends(limit_chat)):
+    """Same as /chat, but relays tokens over server-sent events as they arrive"""
+    _require_api_key()
+    messages, session = await _prepare_chat(request, current_user, db)
+    payload = _llm_request(messages, stream=True)
+    
+    async def on_complete(result):
+        await _record_turn(db, session, current_user, request, result)
+    
+    return StreamingResponse(
+        _stream_chat(payload, _cache_key(payload, current_user), request.message, on_complete, slot.detach()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Release is idempotent; this covers a stream that never started
+        background=BackgroundTask(slot.release)
+    )
+
+
+def _socket_message(text: str) -> Optional[str]:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    message = data.get("message") if isinstance(data, dict) else None
+    return message if isinstance(message, str) and message.strip() else None
+
+
+@chat_router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, token: str = Query(...), session_id: Optional[str] = None):
+    """
+    Chat over one long-lived connection: the token is checked once on
+    connect and the session's recent history is kept in memory, so each
+    turn only carries {"message": "..."}. Replies arrive as token frames
+    followed by an emotion (or error) frame; turns run one at a time.
+    """
+    db = await get_database()
+    try:
+        current_user = await authenticate_token(token, db)
+        if session_id:
+            session_oid = parse_session_id(session_id)
+            history, summary = await load_session_context(db, session_oid, current_user["_id"])
+        else:
+            # Created on the first message, so idle connections leave nothing behind
+            session_oid, history, summary = None, [], None
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    websocket_connections.inc()
+    sender = FrameSender(websocket)
+    try:
+        if session_oid is not None:
+            await sender.send({"type": "session", "session_id": str(session_oid)})
+        while True:
+            try:
+                frame = await asyncio.wait_for(websocket.receive(), WS_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                await sender.flush()
+                await websocket.close()
+                return
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", status.WS_1000_NORMAL_CLOSURE))
+            if frame.get("text") is None:
+                await sender.send({"type": "error", "detail": "Only text frames are accepted"})
+                await sender.flush()
+                await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+                return
+            message = _socket_message(frame["text"])
+            if message is None:
+                await sender.send({"type": "error", "detail": 'Expected {"message": "..."}'})
+                continue
+            try:
+                await limit_chat_message(websocket, str(current_user["_id"]))
+                _require_api_key()
+                # Same per-user cap as /chat and /chat/stream, so extra sockets don't bypass it
+                slot = await acquire_chat_slot(str(current_user["_id"]))
+            except HTTPException as e:
+                await sender.send({"type": "error", "detail": e.detail, "status_code": e.status_code})
+                continue
+            try:
+                if session_oid is None:
+                    session_oid = await create_session(db, current_user["_id"])
+                    await sender.send({"type": "session", "session_id": str(session_oid)})
+
+                request = ChatRequest(message=message, session_id=str(session_oid))
+                history, summary = slide_context(history, summary)
+                payload = _llm_request(build_messages(request, history, summary), stream=True)
+                turn = (session_oid, summary)
+
+                async def on_complete(result):
+                    await _record_turn(db, turn, current_user, request, result)
+                    history.extend([
+                        {"role": "user", "content": request.message},
+                        {"role": "assistant", "content": result["message"]}
+                    ])
+
+                relay = _relay_chat(payload, _cache_key(payload, current_user), message, on_complete)
+                try:
+                    # Waits while the send queue is full, which in turn stops
+                    # reading upstream until the client catches up
+                    async for event, data in relay:
+                        await sender.send({"type": event, **data})
+                finally:
+                    await relay.aclose()
+            finally:
+                await slot.release()
+    except (WebSocketDisconnect, ClientGone):
+        pass
+    except SlowConsumer:
+        websocket_slow_consumers.inc()
+        await sender.close()
+        try:
+            await asyncio.wait_for(websocket.close(code=status.WS_1008_POLICY_VIOLATION), 1)
+        except Exception:
+            pass
+    finally:
+        await sender.close()
+        websocket_connections.dec()
+
+
+@chat_router.get("/cache-stats")
+async def read_completion_cache_stats(current_user=Depends(get_current_admin_user)):
+    """Hit/miss counters for the chat completion cache (admins only)"""
+    return completion_cache.stats()
+
+
+@chat_router.get("/insights")
+async def read_insights(
+    days: int = Query(30, ge=1, le=366),
+    current_user=Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """Emotion counts and daily trend for the current user, served from daily rollups"""
+    return await get_insights(db, current_user["_id"], days)
+
+
+class SessionResponse(BaseModel):
+    id: str
+
+
+@chat_router.post("/sessions", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
+async def start_session(current_user=Depends(get_current_active_user), db=Depends(get_database)):
+    """Start a server-side conversation; pass its id as session_id to /chat"""
+    session_id = await create_session(db, current_user["_id"])
+    return {"id": str(session_id)}
 
 
 @chat_router.post("/save-conversation", status_code=status.HTTP_201_CREATED)
@@ -109,13 +493,16 @@ async def save_conversation(conversation: List[ChatMessage], current_user=Depend
     """Save a conversation history to the database"""
     conversations_collection = db.conversations
     
+    now = datetime.utcnow()
     conversation_data = {
         "user_id": current_user["_id"],
         "messages": [{
             "role": msg.role,
             "content": msg.content
         } for msg in conversation],
-        "created_at": datetime.utcnow()
+        "message_count": len(conversation),
+        "created_at": now,
+        "updated_at": now
     }
     
     result = await conversations_collection.insert_one(conversation_data)
@@ -123,16 +510,117 @@ async def save_conversation(conversation: List[ChatMessage], current_user=Depend
     return {"id": str(result.inserted_id)}
 
 
-@chat_router.get("/conversations", response_model=List[dict])
-async def get_conversations(current_user=Depends(get_current_active_user), db=Depends(get_database)):
-    """Get all conversations for the current user"""
-    conversations_collection = db.conversations
+class ConversationSummary(BaseModel):
+    id: str
+    created_at: datetime
+    updated_at: datetime
+    message_count: int
+    last_message: Optional[str] = None
+
+
+class ConversationPage(BaseModel):
+    items: List[ConversationSummary]
+    next_cursor: Optional[str] = None
+
+
+class StoredMessage(BaseModel):
+    role: str
+    content: str
+    emotion: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class MessagePage(BaseModel):
+    items: List[StoredMessage]
+    message_count: int
+    next_cursor: Optional[str] = None
+
+
+@chat_router.get("/conversations", response_model=ConversationPage)
+async def get_conversations(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user=Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """List the current user's conversations (metadata only), most recently active first"""
+    query = keyset_filter({"user_id": current_user["_id"]}, "updated_at", cursor)
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"updated_at": -1, "_id": -1}},
+        # Fetch one extra conversation to know whether another page exists
+        {"$limit": limit + 1},
+        {"$project": {
+            "_id": 1,
+            "created_at": 1,
+            "updated_at": 1,
+            "message_count": {"$size": {"$ifNull": ["$messages", []]}},
+            "last_message": {"$substrCP": [
+                {"$ifNull": [{"$let": {
+                    "vars": {"last": {"$arrayElemAt": ["$messages", -1]}},
+                    "in": "$$last.content"
+                }}, ""]},
+                0,
+                CONVERSATION_PREVIEW_LENGTH
+            ]}
+        }}
+    ]
+    conversations = await db.conversations.aggregate(pipeline).to_list(length=limit + 1)
     
-    conversations = await conversations_collection.find({"user_id": current_user["_id"]}).to_list(length=100)
+    next_cursor = None
+    if len(conversations) > limit:
+        conversations = conversations[:limit]
+        next_cursor = encode_cursor(conversations[-1]["updated_at"], conversations[-1]["_id"])
     
-    # Convert ObjectId to string
     for conv in conversations:
-        conv["id"] = str(conv["_id"])
-        del conv["_id"]
+        conv["id"] = str(conv.pop("_id"))
     
-    return conversations
\ No newline at end of file
+    return {"items": conversations, "next_cursor": next_cursor}
+
+
+@chat_router.get("/conversations/{conversation_id}/messages", response_model=MessagePage)
+async def get_conversation_messages(
+    conversation_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user=Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """Page through one conversation's messages, oldest first"""
+    try:
+        start = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if start < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    
+    pipeline = [
+        {"$match": {"_id": parse_session_id(conversation_id), "user_id": current_user["_id"]}},
+        {"$project": {
+            "messages": {"$slice": [{"$ifNull": ["$messages", []]}, start, limit]},
+            "message_count": {"$size": {"$ifNull": ["$messages", []]}}
+        }}
+    ]
+    result = await db.conversations.aggregate(pipeline).to_list(length=1)
+    if not result:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+    
+    conversation = result[0]
+    end = start + len(conversation["messages"])
+    return {
+        "items": conversation["messages"],
+        "message_count": conversation["message_count"],
+        "next_cursor": str(end) if end < conversation["message_count"] else None
+    }
+
+
+@chat_router.get("/conversations/export")
+async def export_conversations(
+    batch_size: int = Query(100, ge=1, le=1000),
+    gzip: bool = False,
+    current_user=Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """Stream every conversation of the current user as NDJSON"""
+    cursor = db.conversations.find({"user_id": current_user["_id"]}, {"user_id": 0}).sort("_id", 1)
+    return ndjson_response(cursor, batch_size, gzip=gzip, filename="conversations.ndjson")
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
 from ..auth import get_current_active_user
+from ..classifier import classify, classify_batch
 from ..database import get_database
+from ..pagination import encode_cursor, keyset_filter
+from ..search import SEARCH_BACKEND, make_snippet, note_index, query_terms
+from ..streaming import ndjson_response
 
 notes_router = APIRouter()
 
+# Characters of content returned per note in summary mode
+NOTE_PREVIEW_LENGTH = 200
+
+# Maximum operations accepted by a single bulk request
+MAX_BULK_OPERATIONS = 1000
+
 
 class NoteCreate(BaseModel):
     title: str
@@ -24,6 +37,7 @@ class NoteResponse(BaseModel):
     id: str
     title: str
     content: str
+    emotion: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -33,16 +47,59 @@ class NoteResponse(BaseModel):
         }
 
 
-@notes_router.get("/", response_model=List[NoteResponse])
-async def get_notes(current_user=Depends(get_current_active_user), db=Depends(get_database)):
+class NoteSummary(BaseModel):
+    id: str
+    title: str
+    preview: str
+    emotion: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class NotePage(BaseModel):
+    items: List[Union[NoteResponse, NoteSummary]]
+    next_cursor: Optional[str] = None
+
+
+@notes_router.get("/", response_model=NotePage)
+async def get_notes(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    summary: bool = False,
+    current_user=Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """List notes newest first, one page at a time"""
     notes_collection = db.notes
-    notes = await notes_collection.find({"user_id": current_user["_id"]}).to_list(length=100)
+    query = keyset_filter({"user_id": current_user["_id"]}, "updated_at", cursor)
+    
+    projection = None
+    if summary:
+        projection = {
+            "title": 1,
+            "emotion": 1,
+            "created_at": 1,
+            "updated_at": 1,
+            "preview": {"$substrCP": ["$content", 0, NOTE_PREVIEW_LENGTH]},
+        }
+    
+    # Fetch one extra note to know whether another page exists
+    notes = await notes_collection.find(query, projection) \
+        .sort([("updated_at", -1), ("_id", -1)]) \
+        .limit(limit + 1) \
+        .to_list(length=limit + 1)
+    
+    next_cursor = None
+    if len(notes) > limit:
+        notes = notes[:limit]
+        next_cursor = encode_cursor(notes[-1]["updated_at"], notes[-1]["_id"])
     
     # Convert ObjectId to string for each note
     for note in notes:
         note["id"] = str(note["_id"])
     
-    return notes
+    items = [NoteSummary(**note) if summary else NoteResponse(**note) for note in notes]
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @notes_router.post("/", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
@@ -53,6 +110,7 @@ async def create_note(note: NoteCreate, current_user=Depends(get_current_active_
     new_note = {
         "title": note.title,
         "content": note.content,
+        "emotion": classify(f"{note.title}\n{note.content}"),
         "user_id": current_user["_id"],
         "created_at": now,
         "updated_at": now
@@ -60,21 +118,279 @@ async def create_note(note: NoteCreate, current_user=Depends(get_current_active_
     
     result = await notes_collection.insert_one(new_note)
     
-    # Get the created note
-    created_note = await notes_collection.find_one({"_id": result.inserted_id})
-    created_note["id"] = str(created_note["_id"])
+    # The inserted document is exactly what we sent, no need to re-read it
+    new_note["id"] = str(result.inserted_id)
+    if SEARCH_BACKEND == "memory":
+        note_index.add(current_user["_id"], result.inserted_id, note.title, note.content)
     
-    return created_note
+    return new_note
 
 
-@notes_router.get("/{note_id}", response_model=NoteResponse)
-async def get_note(note_id: str, current_user=Depends(get_current_active_user), db=Depends(get_database)):
+class BulkNoteOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+
+
+class BulkNoteRequest(BaseModel):
+    operations: List[BulkNoteOperation]
+    ordered: bool = True
+
+
+class BulkNoteResult(BaseModel):
+    index: int
+    op: str
+    # "unconfirmed": applied, but the write concern was not satisfied
+    status: Literal["ok", "not_found", "error", "skipped", "unconfirmed"]
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkNoteResponse(BaseModel):
+    results: List[BulkNoteResult]
+
+
+@notes_router.post("/bulk", response_model=BulkNoteResponse)
+async def bulk_notes(request: BulkNoteRequest, current_user=Depends(get_current_active_user), db=Depends(get_database)):
+    """Apply a batch of note creates, updates and deletes with one bulk_write"""
     notes_collection = db.notes
+    operations = request.operations
+    if len(operations) > MAX_BULK_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_OPERATIONS} operations per request"
+        )
+    
+    # Validate everything up front so a bad item never half-applies a batch
+    note_ids = []
+    targeted_ids = set()
+    for index, item in enumerate(operations):
+        if item.op == "create":
+            if item.title is None or item.content is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Operation {index}: create requires title and content"
+                )
+            note_ids.append(ObjectId())
+        else:
+            try:
+                note_id = ObjectId(item.id)
+            except (InvalidId, TypeError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Operation {index}: invalid note ID format"
+                )
+            # Per-item results would be ambiguous if two operations hit one note
+            if note_id in targeted_ids:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Operation {index}: note {item.id} appears more than once"
+                )
+            targeted_ids.add(note_id)
+            note_ids.append(note_id)
+    
+    # Resolve which targeted notes belong to the user so results are per item
+    targeted = [note_ids[i] for i, item in enumerate(operations) if item.op != "create"]
+    owned = set()
+    if targeted:
+        cursor = notes_collection.find({"_id": {"$in": targeted}, "user_id": current_user["_id"]}, {"_id": 1})
+        owned = {doc["_id"] async for doc in cursor}
     
+    # Classify every created or fully rewritten note in one vectorized pass
+    tagged = [i for i, item in enumerate(operations)
+              if item.op != "delete" and item.title is not None and item.content is not None]
+    emotions = dict(zip(tagged, classify_batch(f"{operations[i].title}\n{operations[i].content}" for i in tagged)))
+    
+    now = datetime.utcnow()
+    results = []
+    requests = []
+    request_indexes = []
+    for index, item in enumerate(operations):
+        note_id = note_ids[index]
+        results.append(BulkNoteResult(index=index, op=item.op, status="ok", id=str(note_id)))
+        if item.op == "create":
+            requests.append(InsertOne({
+                "_id": note_id,
+                "title": item.title,
+                "content": item.content,
+                "emotion": emotions[index],
+                "user_id": current_user["_id"],
+                "created_at": now,
+                "updated_at": now
+            }))
+        elif note_id not in owned:
+            results[index].status = "not_found"
+            continue
+        elif item.op == "update":
+            update_data = {k: v for k, v in {"title": item.title, "content": item.content}.items() if v is not None}
+            update_data["updated_at"] = now
+            requests.append(UpdateOne({"_id": note_id, "user_id": current_user["_id"]}, _note_update(update_data, emotions.get(index))))
+        else:
+            requests.append(DeleteOne({"_id": note_id, "user_id": current_user["_id"]}))
+        request_indexes.append(index)
+    
+    if requests:
+        try:
+            await notes_collection.bulk_write(requests, ordered=request.ordered)
+        except BulkWriteError as e:
+            failed = set()
+            for write_error in e.details.get("writeErrors", []):
+                index = request_indexes[write_error["index"]]
+                results[index].status = "error"
+                results[index].error = write_error.get("errmsg")
+                failed.add(write_error["index"])
+            # An ordered bulk write stops at the first error
+            if request.ordered and failed:
+                for position in range(min(failed) + 1, len(requests)):
+                    results[request_indexes[position]].status = "skipped"
+            # Writes that went through are not known to be durable
+            concern_errors = e.details.get("writeConcernErrors", [])
+            if concern_errors:
+                for index in request_indexes:
+                    if results[index].status == "ok":
+                        results[index].status = "unconfirmed"
+                        results[index].error = concern_errors[0].get("errmsg")
+    
+    if SEARCH_BACKEND == "memory":
+        await _reindex_bulk(notes_collection, current_user["_id"], operations, note_ids, results)
+    
+    return {"results": results}
+
+
+async def _reindex_bulk(notes_collection, user_id, operations, note_ids, results):
+    """Mirror applied bulk operations into the in-process search index"""
+    updated = []
+    for index, item in enumerate(operations):
+        if results[index].status not in ("ok", "unconfirmed"):
+            continue
+        if item.op == "create":
+            note_index.add(user_id, note_ids[index], item.title, item.content)
+        elif item.op == "delete":
+            note_index.remove(user_id, note_ids[index])
+        else:
+            updated.append(note_ids[index])
+    # Partial updates need the full note to reindex it
+    if updated:
+        cursor = notes_collection.find({"_id": {"$in": updated}, "user_id": user_id}, {"title": 1, "content": 1})
+        async for note in cursor:
+            note_index.add(user_id, note["_id"], note["title"], note["content"])
+
+
+class NoteSearchHit(BaseModel):
+    id: str
+    title: str
+    snippet: str
+    highlights: List[List[int]]
+    score: float
+    updated_at: datetime
+
+
+class NoteSearchPage(BaseModel):
+    items: List[NoteSearchHit]
+    next_cursor: Optional[str] = None
+
+
+async def _search_in_memory(db, user_id, q: str, offset: int, count: int):
+    """Rank with the in-process index, then fetch just the page of notes"""
+    hits = note_index.search(user_id, q, offset + count)[offset:]
+    if not hits:
+        return []
+    ids = [ObjectId(doc_id) for doc_id, _ in hits]
+    cursor = db.notes.find({"_id": {"$in": ids}, "user_id": user_id}, {"title": 1, "content": 1, "updated_at": 1})
+    found = {str(note["_id"]): note async for note in cursor}
+    notes = []
+    for doc_id, score in hits:
+        if doc_id in found:
+            found[doc_id]["score"] = score
+            notes.append(found[doc_id])
+    return notes
+
+
+@notes_router.get("/search", response_model=NoteSearchPage)
+async def search_notes(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    current_user=Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """Full-text search over the current user's notes, best matches first"""
     try:
-        note = await notes_collection.find_one({"_id": ObjectId(note_id), "user_id": current_user["_id"]})
-    except:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    
+    if SEARCH_BACKEND == "memory":
+        notes = await _search_in_memory(db, current_user["_id"], q, offset, limit + 1)
+    else:
+        score = {"$meta": "textScore"}
+        notes = await db.notes.find(
+            {"user_id": current_user["_id"], "$text": {"$search": q}},
+            {"title": 1, "content": 1, "updated_at": 1, "score": score}
+        ).sort([("score", score), ("_id", -1)]).skip(offset).limit(limit + 1).to_list(length=limit + 1)
+    
+    next_cursor = None
+    if len(notes) > limit:
+        notes = notes[:limit]
+        next_cursor = str(offset + limit)
+    
+    terms = query_terms(q)
+    items = []
+    for note in notes:
+        snippet, highlights = make_snippet(note.get("content", ""), terms)
+        items.append({
+            "id": str(note["_id"]),
+            "title": note["title"],
+            "snippet": snippet,
+            "highlights": highlights,
+            "score": note["score"],
+            "updated_at": note["updated_at"]
+        })
+    
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@notes_router.get("/export")
+async def export_notes(
+    batch_size: int = Query(500, ge=1, le=5000),
+    gzip: bool = False,
+    current_user=Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """Stream every note of the current user as NDJSON"""
+    cursor = db.notes.find({"user_id": current_user["_id"]}, {"user_id": 0}).sort("_id", 1)
+    return ndjson_response(cursor, batch_size, gzip=gzip, filename="notes.ndjson")
+
+
+def _note_update(update_data, emotion: Optional[str]):
+    """
+    Build the update for an edited note. A title-only edit keeps its tag. A
+    content edit without the title cannot be classified without the stored
+    text, so its tag is cleared for the emotion backfill to recompute rather
+    than spending another round trip here.
+    """
+    if emotion is not None:
+        return {"$set": {**update_data, "emotion": emotion}}
+    if "content" not in update_data:
+        return {"$set": update_data}
+    return {"$set": update_data, "$unset": {"emotion": ""}}
+
+
+def _parse_note_id(note_id: str) -> ObjectId:
+    try:
+        return ObjectId(note_id)
+    except (InvalidId, TypeError):
         raise HTTPException(status_code=400, detail="Invalid note ID format")
+
+
+@notes_router.get("/{note_id}", response_model=NoteResponse)
+async def get_note(note_id: str, current_user=Depends(get_current_active_user), db=Depends(get_database)):
+    notes_collection = db.notes
+    
+    note = await notes_collection.find_one({"_id": _parse_note_id(note_id), "user_id": current_user["_id"]})
     
     if note is None:
         raise HTTPException(status_code=404, detail="Note not found")
@@ -87,21 +403,24 @@ async def get_note(note_id: str, current_user=Depends(get_current_active_user),
 async def update_note(note_id: str, note: NoteUpdate, current_user=Depends(get_current_active_user), db=Depends(get_database)):
     notes_collection = db.notes
     
-    try:
-        existing_note = await notes_collection.find_one({"_id": ObjectId(note_id), "user_id": current_user["_id"]})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid note ID format")
-    
-    if existing_note is None:
-        raise HTTPException(status_code=404, detail="Note not found")
-    
     update_data = {k: v for k, v in note.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
+    emotion = None
+    if note.title is not None and note.content is not None:
+        emotion = classify(f"{note.title}\n{note.content}")
     
-    await notes_collection.update_one({"_id": ObjectId(note_id)}, {"$set": update_data})
+    updated_note = await notes_collection.find_one_and_update(
+        {"_id": _parse_note_id(note_id), "user_id": current_user["_id"]},
+        _note_update(update_data, emotion),
+        return_document=ReturnDocument.AFTER
+    )
+    
+    if updated_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
     
-    updated_note = await notes_collection.find_one({"_id": ObjectId(note_id)})
     updated_note["id"] = str(updated_note["_id"])
+    if SEARCH_BACKEND == "memory":
+        note_index.add(current_user["_id"], updated_note["_id"], updated_note["title"], updated_note["content"])
     
     return updated_note
 
@@ -110,14 +429,13 @@ async def update_note(note_id: str, note: NoteUpdate, current_user=Depends(get_c
 async def delete_note(note_id: str, current_user=Depends(get_current_active_user), db=Depends(get_database)):
     notes_collection = db.notes
     
-    try:
-        existing_note = await notes_collection.find_one({"_id": ObjectId(note_id), "user_id": current_user["_id"]})
-    except:
-        raise HTTPException(status_code=400, detail="Invalid note ID format")
+    object_id = _parse_note_id(note_id)
+    result = await notes_collection.delete_one({"_id": object_id, "user_id": current_user["_id"]})
     
-    if existing_note is None:
+    if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Note not found")
     
-    await notes_collection.delete_one({"_id": ObjectId(note_id)})
+    if SEARCH_BACKEND == "memory":
+        note_index.remove(current_user["_id"], object_id)
     
-    return None
\ No newline at end of file
+    return None
@@ -0,0 +1,269 @@
+import heapq
+import math
+import os
+import pickle
+import re
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Search backend: "mongo" (text index) or "memory" (in-process inverted index)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "mongo").lower()
+# Where the in-process index is snapshotted on shutdown and loaded on startup
+SEARCH_INDEX_SNAPSHOT = os.getenv("SEARCH_INDEX_SNAPSHOT")
+SNAPSHOT_VERSION = 1
+
+# Characters of context shown around the first match in a snippet
+SNIPPET_RADIUS = 80
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return [term.lower() for term in _WORD.findall(text)]
+
+
+def query_terms(query: str) -> List[str]:
+    return tokenize(query)
+
+
+def make_snippet(text: str, terms: List[str], radius: int = SNIPPET_RADIUS) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Cut a window of text around the first matching term and return it with
+    the [start, end) offsets of every term match inside the window, so the
+    client can highlight them without trusting server-side markup.
+    """
+    if not text:
+        return "", []
+    pattern = None
+    if terms:
+        pattern = re.compile("|".join(re.escape(term) for term in sorted(set(terms), key=len, reverse=True)),
+                             re.IGNORECASE)
+    first = pattern.search(text) if pattern else None
+    if first is None:
+        snippet = text[:2 * radius]
+        offset = 0
+    else:
+        offset = max(0, first.start() - radius)
+        snippet = text[offset:first.end() + radius]
+    highlights = [(m.start(), m.end()) for m in pattern.finditer(snippet)] if pattern else []
+    prefix = "..." if offset > 0 else ""
+    suffix = "..." if offset + len(snippet) < len(text) else ""
+    shift = len(prefix)
+    return prefix + snippet + suffix, [(start + shift, end + shift) for start, end in highlights]
+
+
+# Title terms count this many times towards a note's term frequencies
+TITLE_WEIGHT = 3
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class _UserIndex:
+    """
+    Postings for one user's notes. Each term maps to two parallel arrays of
+    doc numbers and term frequencies. Removed notes are tombstoned and the
+    postings are compacted once tombstones outnumber live notes.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.doc_ids: List[Optional[str]] = []
+        self.doc_lengths = array("I")
+        self.docnum_of: Dict[str, int] = {}
+        self.total_length = 0
+        self.deleted = 0
+
+    @property
+    def live(self) -> int:
+        return len(self.docnum_of)
+
+    def add(self, doc_id: str, title: str, content: str):
+        self.remove(doc_id)
+        counts = Counter(tokenize(content))
+        for term in tokenize(title):
+            counts[term] += TITLE_WEIGHT
+        docnum = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.docnum_of[doc_id] = docnum
+        length = sum(counts.values())
+        self.doc_lengths.append(length)
+        self.total_length += length
+        for term, tf in counts.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("I"), array("I"))
+            entry[0].append(docnum)
+            entry[1].append(tf)
+
+    def remove(self, doc_id: str):
+        docnum = self.docnum_of.pop(doc_id, None)
+        if docnum is None:
+            return
+        self.doc_ids[docnum] = None
+        self.total_length -= self.doc_lengths[docnum]
+        self.deleted += 1
+        if self.deleted > 64 and self.deleted > self.live:
+            self.compact()
+
+    def compact(self):
+        """Drop tombstoned notes and renumber the survivors."""
+        remap = {}
+        doc_ids, doc_lengths = [], array("I")
+        for docnum, doc_id in enumerate(self.doc_ids):
+            if doc_id is not None:
+                remap[docnum] = len(doc_ids)
+                doc_ids.append(doc_id)
+                doc_lengths.append(self.doc_lengths[docnum])
+        postings = {}
+        for term, (docs, tfs) in self.postings.items():
+            new_docs, new_tfs = array("I"), array("I")
+            for docnum, tf in zip(docs, tfs):
+                if docnum in remap:
+                    new_docs.append(remap[docnum])
+                    new_tfs.append(tf)
+            if new_docs:
+                postings[term] = (new_docs, new_tfs)
+        self.postings = postings
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.docnum_of = {doc_id: docnum for docnum, doc_id in enumerate(doc_ids)}
+        self.deleted = 0
+
+    def search(self, terms: List[str], count: int) -> List[Tuple[str, float]]:
+        n = self.live
+        if n == 0:
+            return []
+        avg_length = self.total_length / n or 1.0
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            docs, tfs = entry
+            df = sum(1 for docnum in docs if self.doc_ids[docnum] is not None)
+            if df == 0:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for docnum, tf in zip(docs, tfs):
+                if self.doc_ids[docnum] is None:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[docnum] / avg_length)
+                scores[docnum] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = heapq.nlargest(count, scores.items(), key=lambda item: (item[1], item[0]))
+        return [(self.doc_ids[docnum], score) for docnum, score in best]
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "postings": {term: (docs.tobytes(), tfs.tobytes()) for term, (docs, tfs) in self.postings.items()},
+            "doc_ids": self.doc_ids,
+            "doc_lengths": self.doc_lengths.tobytes(),
+            "total_length": self.total_length,
+            "deleted": self.deleted,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "_UserIndex":
+        index = cls()
+        for term, (docs, tfs) in state["postings"].items():
+            index.postings[term] = (array("I", docs), array("I", tfs))
+        index.doc_ids = state["doc_ids"]
+        index.doc_lengths = array("I", state["doc_lengths"])
+        index.docnum_of = {doc_id: docnum for docnum, doc_id in enumerate(index.doc_ids) if doc_id is not None}
+        index.total_length = state["total_length"]
+        index.deleted = state["deleted"]
+        return index
+
+
+class NoteIndex:
+    """
+    In-process inverted index over notes with BM25 ranking, kept per user.
+    Used instead of Mongo text search when SEARCH_BACKEND=memory; each
+    worker holds its own copy, so it suits single-process deployments.
+    """
+
+    def __init__(self):
+        self.users: Dict[str, _UserIndex] = {}
+        self.built_at: Optional[datetime] = None
+
+    def add(self, user_id, doc_id, title: str, content: str):
+        self.users.setdefault(str(user_id), _UserIndex()).add(str(doc_id), title or "", content or "")
+
+    def remove(self, user_id, doc_id):
+        user_index = self.users.get(str(user_id))
+        if user_index is not None:
+            user_index.remove(str(doc_id))
+
+    def search(self, user_id, query: str, count: int) -> List[Tuple[str, float]]:
+        user_index = self.users.get(str(user_id))
+        if user_index is None:
+            return []
+        return user_index.search(query_terms(query), count)
+
+    async def build(self, db, batch_size: int = 1000):
+        """Index every note, streaming them from Mongo."""
+        self.users = {}
+        self.built_at = datetime.utcnow()
+        cursor = db.notes.find({}, {"user_id": 1, "title": 1, "content": 1}).batch_size(batch_size)
+        async for note in cursor:
+            self.add(note["user_id"], note["_id"], note.get("title"), note.get("content"))
+
+    async def catch_up(self, db, batch_size: int = 1000):
+        """
+        Bring a snapshot-loaded index up to date: reindex notes changed since
+        the snapshot and drop notes that no longer exist.
+        """
+        since = self.built_at
+        self.built_at = datetime.utcnow()
+        changed = db.notes.find({"updated_at": {"$gte": since}}, {"user_id": 1, "title": 1, "content": 1})
+        async for note in changed.batch_size(batch_size):
+            self.add(note["user_id"], note["_id"], note.get("title"), note.get("content"))
+        existing = set()
+        async for note in db.notes.find({}, {"_id": 1}).batch_size(batch_size * 10):
+            existing.add(str(note["_id"]))
+        for user_index in self.users.values():
+            for doc_id in [doc_id for doc_id in user_index.docnum_of if doc_id not in existing]:
+                user_index.remove(doc_id)
+
+    def save(self, path: str):
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "built_at": self.built_at,
+            "users": {user_id: user_index.state() for user_id, user_index in self.users.items()},
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """Load a snapshot written by save(); returns False if it is unusable."""
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+        if state.get("version") != SNAPSHOT_VERSION:
+            return False
+        self.built_at = state["built_at"]
+        self.users = {user_id: _UserIndex.from_state(s) for user_id, s in state["users"].items()}
+        return True
+
+
+async def start_note_index(db):
+    """Load the snapshot (catching up with Mongo) or build the index from scratch."""
+    if SEARCH_INDEX_SNAPSHOT and os.path.exists(SEARCH_INDEX_SNAPSHOT) and note_index.load(SEARCH_INDEX_SNAPSHOT):
+        await note_index.catch_up(db)
+    else:
+        await note_index.build(db)
+
+
+def stop_note_index():
+    if SEARCH_INDEX_SNAPSHOT:
+        note_index.save(SEARCH_INDEX_SNAPSHOT)
+
+
+note_index = NoteIndex()
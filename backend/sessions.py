@@ -0,0 +1,79 @@
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+
+from .context_window import CHAT_CONTEXT_SUMMARY, summarize_turns
+
+# Messages of a session loaded as context for the next turn (keep it even,
+# since every turn appends a user message and an assistant reply)
+CHAT_SESSION_HISTORY_TAIL = int(os.getenv("CHAT_SESSION_HISTORY_TAIL", "20")) // 2 * 2
+
+
+def parse_session_id(session_id: str) -> ObjectId:
+    try:
+        return ObjectId(session_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid session ID format")
+
+
+async def create_session(db, user_id) -> ObjectId:
+    now = datetime.utcnow()
+    result = await db.conversations.insert_one({
+        "user_id": user_id,
+        "messages": [],
+        "message_count": 0,
+        "summary": None,
+        "created_at": now,
+        "updated_at": now
+    })
+    return result.inserted_id
+
+
+async def load_session_context(db, session_id: ObjectId, user_id) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Load the bounded tail of a session's history plus its rolling summary.
+    The two messages just ahead of the tail are the ones that slid out of it
+    on the previous turn; they are folded into the summary here.
+    """
+    session = await db.conversations.find_one(
+        {"_id": session_id, "user_id": user_id},
+        {"messages": {"$slice": -(CHAT_SESSION_HISTORY_TAIL + 2)}, "message_count": 1, "summary": 1}
+    )
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+
+    return slide_context(session.get("messages", []), session.get("summary"))
+
+
+def slide_context(messages: List[Dict[str, Any]], summary: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Keep the last CHAT_SESSION_HISTORY_TAIL messages, folding older ones into
+    the summary. Long-lived connections call this on the history they keep
+    in memory, which stays in step with what load_session_context returns.
+    """
+    leaving = messages[:max(0, len(messages) - CHAT_SESSION_HISTORY_TAIL)]
+    if leaving and CHAT_CONTEXT_SUMMARY:
+        summary = summarize_turns([SimpleNamespace(**m) for m in leaving], summary)
+    return messages[len(leaving):], summary
+
+
+async def append_turn(db, session_id: ObjectId, user_id, user_message: str, reply: Dict[str, str],
+                      summary: Optional[str] = None):
+    """Append one user message and the assistant reply with a single $push."""
+    now = datetime.utcnow()
+    await db.conversations.update_one(
+        {"_id": session_id, "user_id": user_id},
+        {
+            "$push": {"messages": {"$each": [
+                {"role": "user", "content": user_message, "created_at": now},
+                {"role": "assistant", "content": reply["message"], "emotion": reply["emotion"], "created_at": now},
+            ]}},
+            "$inc": {"message_count": 2},
+            "$set": {"updated_at": now, "summary": summary}
+        }
+    )
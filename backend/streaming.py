@@ -0,0 +1,54 @@
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict
+
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _export_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+async def ndjson_lines(cursor, batch_size: int) -> AsyncIterator[bytes]:
+    """
+    Serialize documents from a Motor cursor as NDJSON, yielding one chunk per
+    cursor batch so memory stays bounded by batch_size.
+    """
+    cursor.batch_size(batch_size)
+    lines = []
+    async for doc in cursor:
+        lines.append(json.dumps(_export_document(doc), default=_json_default))
+        if len(lines) >= batch_size:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def _gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def ndjson_response(cursor, batch_size: int, gzip: bool = False, filename: str = "export.ndjson") -> StreamingResponse:
+    body = ndjson_lines(cursor, batch_size)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        body = _gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,64 @@
+import asyncio
+import os
+from typing import Any, Dict
+
+from fastapi import WebSocket
+
+# Frames buffered per WebSocket before the producer (e.g. an upstream
+# token stream) has to wait for the client to read
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+# A client that reads nothing for this long while frames are waiting is dropped
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+# Idle connections (no message from the client) are closed after this long
+WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "300"))
+
+
+class SlowConsumer(Exception):
+    """The client stopped reading and the send queue stayed full."""
+
+
+class ClientGone(Exception):
+    """The connection closed while frames were still being sent."""
+
+
+class FrameSender:
+    """
+    Sends JSON frames to a WebSocket from one background task, through a
+    bounded queue. send() waits while the queue is full, so a client that
+    reads slowly slows down whatever produces the frames instead of
+    letting them pile up in memory.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int = WS_SEND_QUEUE_SIZE,
+                 send_timeout: float = WS_SEND_TIMEOUT):
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task = asyncio.ensure_future(self._drain())
+
+    async def _drain(self):
+        while True:
+            frame = await self.queue.get()
+            try:
+                await self.websocket.send_json(frame)
+            finally:
+                self.queue.task_done()
+
+    async def send(self, frame: Dict[str, Any]):
+        if self.task.done():
+            raise ClientGone()
+        try:
+            await asyncio.wait_for(self.queue.put(frame), self.send_timeout)
+        except asyncio.TimeoutError:
+            raise ClientGone() if self.task.done() else SlowConsumer()
+
+    async def flush(self):
+        """Wait until every queued frame has been handed to the connection."""
+        try:
+            await asyncio.wait_for(self.queue.join(), self.send_timeout)
+        except asyncio.TimeoutError:
+            raise SlowConsumer()
+
+    async def close(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
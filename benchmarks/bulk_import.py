@@ -0,0 +1,74 @@
+"""
+Compare importing notes one POST at a time against POST /notes/bulk.
+
+    python benchmarks/bulk_import.py --notes 10000 --batch-size 1000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from common import DEFAULT_BASE_URL, register_and_login
+
+
+def make_note(i):
+    return {"title": f"imported note {i}", "content": f"body of imported note {i} " * 8}
+
+
+async def single_import(client, headers, count, concurrency):
+    queue = asyncio.Queue()
+    for i in range(count):
+        queue.put_nowait(i)
+
+    async def worker():
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            response = await client.post("/notes/", json=make_note(i), headers=headers)
+            response.raise_for_status()
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+async def bulk_import(client, headers, count, batch_size):
+    for start in range(0, count, batch_size):
+        operations = [
+            {"op": "create", **make_note(i)}
+            for i in range(start, min(count, start + batch_size))
+        ]
+        response = await client.post(
+            "/notes/bulk", json={"operations": operations, "ordered": False}, headers=headers
+        )
+        response.raise_for_status()
+
+
+async def main(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120) as client:
+        _, _, token = await register_and_login(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        started = time.perf_counter()
+        await single_import(client, headers, args.notes, args.concurrency)
+        single_elapsed = time.perf_counter() - started
+
+        _, _, token = await register_and_login(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        started = time.perf_counter()
+        await bulk_import(client, headers, args.notes, args.batch_size)
+        bulk_elapsed = time.perf_counter() - started
+
+    print(f"single POST /notes/ : {args.notes} notes in {single_elapsed:8.2f}s "
+          f"({args.notes / single_elapsed:8.0f} notes/s, concurrency={args.concurrency})")
+    print(f"POST /notes/bulk    : {args.notes} notes in {bulk_elapsed:8.2f}s "
+          f"({args.notes / bulk_elapsed:8.0f} notes/s, batch={args.batch_size})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
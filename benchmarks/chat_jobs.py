@@ -0,0 +1,73 @@
+"""
+Burst absorption of the asynchronous chat job queue.
+
+    python benchmarks/chat_jobs.py --burst 2000 --workers 8 --queue-size 1000
+
+Submits a burst of chat jobs to the in-memory queue in front of the stub
+provider and reports how long submitting took, time until each result was
+ready, peak concurrent upstream calls and jobs rejected as queue-full.
+No server needed.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.chat_jobs import ChatJobQueue, MemoryJobStore, QueueFull  # noqa: E402
+from backend.llm_providers import StubProvider  # noqa: E402
+from common import format_summary, summarize  # noqa: E402
+
+USER = {"_id": "bench-user"}
+
+
+async def main(args):
+    provider = StubProvider(latency=args.latency)
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(user, request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        try:
+            payload = {"model": "llama3-8b-8192", "messages": [{"role": "user", "content": request["message"]}]}
+            return await provider.complete(payload)
+        finally:
+            in_flight["now"] -= 1
+
+    queue = ChatJobQueue(MemoryJobStore(args.queue_size, 600), handler, args.workers)
+    submit_samples, submitted, rejected = [], [], 0
+    burst_started = time.perf_counter()
+    for i in range(args.burst):
+        started = time.perf_counter()
+        try:
+            job = await queue.submit(USER, {"message": f"I feel anxious about tomorrow ({i})"})
+        except QueueFull:
+            rejected += 1
+            continue
+        submit_samples.append(time.perf_counter() - started)
+        submitted.append((job["_id"], started))
+
+    async def ready(job_id, started):
+        await queue.wait(job_id, USER["_id"], args.timeout)
+        return time.perf_counter() - started
+
+    ready_samples = await asyncio.gather(*[ready(job_id, started) for job_id, started in submitted])
+    elapsed = time.perf_counter() - burst_started
+    await queue.shutdown()
+
+    print(format_summary("submit", summarize(submit_samples)))
+    print(format_summary("result ready", summarize(ready_samples)))
+    print(f"accepted={len(submitted)} rejected={rejected} peak_upstream={in_flight['peak']} "
+          f"drain={elapsed:.2f}s ({len(submitted) / elapsed:.0f} jobs/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=2000, help="jobs submitted at once")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub provider latency in seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="longest wait for one result")
+    asyncio.run(main(parser.parse_args()))
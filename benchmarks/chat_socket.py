@@ -0,0 +1,147 @@
+"""
+Open chat WebSocket connections, server memory per connection and turn latency.
+
+    python benchmarks/chat_socket.py --connections 2000 --step 500 --turns 200
+
+Starts the same throwaway stack as load_suite.py (or drives --base-url,
+with --server-pid for memory readings) and opens connections to
+/emotional-chat/ws in steps, reading the backend's resident memory after
+each step. Then runs chat turns over some of the open connections and
+compares them with the same turns over POST /emotional-chat/chat/stream.
+Raise the open file limit (ulimit -n) for large connection counts.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import websockets
+
+from common import format_summary, summarize
+from load_suite import MESSAGES, Stack, new_user, start_stack
+
+
+def rss_kb(pid):
+    if pid is None:
+        return None
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return None
+
+
+async def socket_turn(ws, message):
+    """Send one message; return (time to first token, time to the final frame)."""
+    started = time.perf_counter()
+    first = None
+    await ws.send(json.dumps({"message": message}))
+    while True:
+        frame = json.loads(await ws.recv())
+        if frame["type"] == "token" and first is None:
+            first = time.perf_counter() - started
+        elif frame["type"] in ("emotion", "error"):
+            elapsed = time.perf_counter() - started
+            return first if first is not None else elapsed, elapsed
+
+
+async def stream_turn(client, user, message):
+    started = time.perf_counter()
+    first = None
+    async with client.stream("POST", "/emotional-chat/chat/stream", headers=user.headers,
+                             json={"message": message}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event: token") and first is None:
+                first = time.perf_counter() - started
+    elapsed = time.perf_counter() - started
+    return first if first is not None else elapsed, elapsed
+
+
+async def run_turns(turn_fn, targets, turns):
+    """Run turns with one in flight per target (a connection only carries one turn at a time)."""
+    first_samples, total_samples = [], []
+    idle = asyncio.Queue()
+    for target in targets:
+        idle.put_nowait(target)
+
+    async def one(index):
+        target = await idle.get()
+        try:
+            first, total = await turn_fn(target, MESSAGES[index % len(MESSAGES)])
+        finally:
+            idle.put_nowait(target)
+        first_samples.append(first)
+        total_samples.append(total)
+
+    await asyncio.gather(*[one(i) for i in range(turns)])
+    return first_samples, total_samples
+
+
+async def main(args):
+    stack = Stack()
+    sockets = []
+    try:
+        base_url = args.base_url or await start_stack(args, stack)
+        pid = args.server_pid or (stack.processes[-1].pid if not args.base_url else None)
+        ws_url = base_url.replace("http", "ws", 1) + "/emotional-chat/ws"
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            user = await new_user(client)
+            token = user.headers["Authorization"].split()[1]
+
+            baseline = rss_kb(pid)
+            print(f"baseline rss={baseline} KB" if baseline else "no server pid, skipping memory readings")
+            previous = baseline
+            while len(sockets) < args.connections:
+                step = min(args.step, args.connections - len(sockets))
+                started = time.perf_counter()
+                sockets += await asyncio.gather(*[
+                    websockets.connect(f"{ws_url}?token={token}", max_queue=None) for _ in range(step)
+                ])
+                opened = time.perf_counter() - started
+                await asyncio.sleep(args.settle)
+                rss = rss_kb(pid)
+                line = f"connections={len(sockets):<7} opened {step} in {opened:.2f}s"
+                if rss is not None:
+                    line += (f" rss={rss} KB (+{(rss - previous) / step:.1f} KB/conn, "
+                             f"{(rss - baseline) / len(sockets):.1f} KB/conn overall)")
+                    previous = rss
+                print(line)
+
+            report = [("websocket", socket_turn, sockets[:args.concurrency])]
+            if not args.skip_http:
+                report.append(("http stream", lambda _, message: stream_turn(client, user, message),
+                               [None] * args.concurrency))
+            for label, turn_fn, targets in report:
+                first, total = await run_turns(turn_fn, targets, args.turns)
+                print(format_summary(f"{label} first token", summarize(first)))
+                print(format_summary(f"{label} full turn", summarize(total)))
+    finally:
+        await asyncio.gather(*[ws.close() for ws in sockets], return_exceptions=True)
+        stack.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="drive an already running backend instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="backend pid for memory readings with --base-url")
+    parser.add_argument("--mongodb-url", help="use this MongoDB instead of starting a throwaway mongod")
+    parser.add_argument("--mongod", default="mongod", help="mongod binary to start")
+    parser.add_argument("--mongod-port", type=int, default=27198)
+    parser.add_argument("--port", type=int, default=8098, help="port for the backend under test")
+    parser.add_argument("--llm-provider", choices=["server", "stub"], default="stub",
+                        help="stub LLM over HTTP (server) or the backend's in-process stub provider")
+    parser.add_argument("--stub-port", type=int, default=9198)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub LLM reply delay in seconds")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the backend, e.g. --env WS_SEND_QUEUE_SIZE=16")
+    parser.add_argument("--connections", type=int, default=2000, help="connections held open")
+    parser.add_argument("--step", type=int, default=500, help="connections opened between memory readings")
+    parser.add_argument("--settle", type=float, default=1.0, help="seconds to wait before reading memory")
+    parser.add_argument("--turns", type=int, default=200, help="chat turns per transport")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections (or requests) chatting at once")
+    parser.add_argument("--skip-http", action="store_true", help="only run turns over the WebSocket")
+    args = parser.parse_args()
+    # Always one process, so its pid is the one holding the connections
+    args.workers = 1
+    asyncio.run(main(args))
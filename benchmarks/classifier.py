@@ -0,0 +1,52 @@
+"""
+Throughput of the local emotion classifier in messages per second.
+
+    python benchmarks/classifier.py --messages 100000
+
+Runs entirely in-process; no server or database needed.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.classifier import LEXICON, get_classifier  # noqa: E402
+
+FILLER = ("today i went to work and then came home after that we talked about the week "
+          "and my plans for the weekend with friends and family").split()
+
+
+def synthetic_messages(count, rng):
+    cues = [cue for words in LEXICON.values() for cue in words]
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(5, 60))]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(cues))
+        messages.append(" ".join(words))
+    return messages
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    messages = synthetic_messages(args.messages, rng)
+    classifier = get_classifier()
+    classifier.predict(messages[:10])
+
+    for batch_size in args.batch_sizes:
+        started = time.perf_counter()
+        for start in range(0, len(messages), batch_size):
+            classifier.predict(messages[start:start + batch_size])
+        elapsed = time.perf_counter() - started
+        print(f"batch {batch_size:>6}: {len(messages) / elapsed:10.0f} messages/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 512, 4096])
+    parser.add_argument("--seed", type=int, default=3)
+    main(parser.parse_args())
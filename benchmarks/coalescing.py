@@ -0,0 +1,71 @@
+"""
+Upstream calls saved by coalescing concurrent identical chat requests.
+
+    python benchmarks/coalescing.py --requests 1000 --distinct 50 --concurrency 100
+
+Fires bursts of requests drawn from a small set of distinct prompts at the
+in-process stub provider, with and without the coalescing wrapper, and
+reports upstream calls made and caller latency. No server needed.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.llm_providers import CoalescingProvider, StubProvider  # noqa: E402
+from common import format_summary, summarize  # noqa: E402
+
+
+class CountingProvider(StubProvider):
+    def __init__(self, latency):
+        super().__init__(latency=latency)
+        self.calls = 0
+
+    async def complete(self, payload):
+        self.calls += 1
+        return await super().complete(payload)
+
+
+def payload_for(prompt):
+    return {"model": "llama3-8b-8192", "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.7, "max_tokens": 800}
+
+
+async def run(provider, prompts, concurrency):
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(prompt):
+        async with semaphore:
+            started = time.perf_counter()
+            await provider.complete(payload_for(prompt))
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[one(prompt) for prompt in prompts])
+    return samples
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    distinct = [f"I feel overwhelmed today ({i})" for i in range(args.distinct)]
+    prompts = [rng.choice(distinct) for _ in range(args.requests)]
+
+    for label, coalesce in (("direct", False), ("coalesced", True)):
+        upstream = CountingProvider(args.latency)
+        provider = CoalescingProvider(upstream) if coalesce else upstream
+        samples = await run(provider, prompts, args.concurrency)
+        print(format_summary(label, summarize(samples)) + f" upstream_calls={upstream.calls}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--distinct", type=int, default=50, help="distinct prompts in the burst")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub provider latency in seconds")
+    parser.add_argument("--seed", type=int, default=17)
+    asyncio.run(main(parser.parse_args()))
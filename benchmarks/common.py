@@ -0,0 +1,56 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+The scripts talk to a running API (``uvicorn backend.main:app``) over HTTP;
+point them elsewhere with ``--base-url``.
+"""
+import secrets
+import statistics
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies (seconds) as milliseconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def format_summary(label: str, summary: Dict[str, float]) -> str:
+    return (
+        f"{label:<28} n={summary['count']:<6} mean={summary['mean_ms']:8.1f}ms "
+        f"p50={summary['p50_ms']:8.1f}ms p95={summary['p95_ms']:8.1f}ms "
+        f"p99={summary['p99_ms']:8.1f}ms"
+    )
+
+
+async def register_and_login(client: httpx.AsyncClient, password: str = "benchmark-pass"):
+    """Create a throwaway user and return (username, password, token)."""
+    suffix = secrets.token_hex(6)
+    username = f"bench_{suffix}"
+    response = await client.post(
+        "/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": password},
+    )
+    response.raise_for_status()
+    response = await client.post(
+        "/auth/login", data={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    return username, password, response.json()["access_token"]
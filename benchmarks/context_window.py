@@ -0,0 +1,68 @@
+"""
+Prompt size and trimming cost of the context window on long conversations.
+
+    python benchmarks/context_window.py --turns 200 --conversations 200
+
+Builds synthetic conversations, runs them through fit_to_budget and
+reports estimated prompt tokens, JSON payload bytes and time per call.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.context_window import estimate_tokens, fit_to_budget  # noqa: E402
+from backend.routes.chat_routes import SYSTEM_PROMPT, ChatMessage  # noqa: E402
+
+WORDS = ("today work family stress sleep anxious happy tired friend weekend "
+         "deadline exam worried proud lonely hopeful calm overwhelmed").split()
+
+
+def synthetic_conversation(turns, rng):
+    messages = [ChatMessage(role="system", content=SYSTEM_PROMPT)]
+    for i in range(turns):
+        role = "user" if i % 2 == 0 else "assistant"
+        length = rng.randint(10, 60) if role == "user" else rng.randint(40, 160)
+        messages.append(ChatMessage(role=role, content=" ".join(rng.choice(WORDS) for _ in range(length))))
+    messages.append(ChatMessage(role="user", content="How should I handle this?"))
+    return messages
+
+
+def prompt_stats(messages):
+    payload = json.dumps([{"role": m.role, "content": m.content} for m in messages])
+    return sum(estimate_tokens(m.content) for m in messages), len(payload)
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    conversations = [synthetic_conversation(args.turns, rng) for _ in range(args.conversations)]
+
+    raw_tokens = raw_bytes = fit_tokens = fit_bytes = 0
+    started = time.perf_counter()
+    fitted = [fit_to_budget(messages, ChatMessage, budget=args.budget)[0] for messages in conversations]
+    elapsed = time.perf_counter() - started
+
+    for messages, trimmed in zip(conversations, fitted):
+        tokens, size = prompt_stats(messages)
+        raw_tokens, raw_bytes = raw_tokens + tokens, raw_bytes + size
+        tokens, size = prompt_stats(trimmed)
+        fit_tokens, fit_bytes = fit_tokens + tokens, fit_bytes + size
+
+    n = len(conversations)
+    print(f"{n} conversations x {args.turns} turns, budget {args.budget} tokens")
+    print(f"unbounded : {raw_tokens / n:9.0f} tokens  {raw_bytes / n / 1024:8.1f} KiB per prompt")
+    print(f"windowed  : {fit_tokens / n:9.0f} tokens  {fit_bytes / n / 1024:8.1f} KiB per prompt")
+    print(f"fit_to_budget: {elapsed / n * 1e6:8.1f} us per conversation")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=6000)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,81 @@
+"""
+Latency of upstream LLM calls with a fresh httpx client per request versus
+the shared pooled client the backend now uses.
+
+    python benchmarks/http_pool.py --requests 500 --concurrency 20
+
+The stub speaks plain HTTP on loopback, so this measures TCP setup and
+client construction only; against api.groq.com the TLS handshake makes
+the gap considerably larger.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.http_client import build_http_client  # noqa: E402
+from common import format_summary, summarize  # noqa: E402
+from stub_llm import start_stub_server, stub_url  # noqa: E402
+
+PAYLOAD = {
+    "model": "llama3-8b-8192",
+    "messages": [{"role": "user", "content": "I feel stressed about work"}],
+    "temperature": 0.7,
+    "max_tokens": 800,
+}
+
+
+async def run(url, count, concurrency, shared=None):
+    samples = []
+    queue = asyncio.Queue()
+    for _ in range(count):
+        queue.put_nowait(None)
+
+    async def worker():
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            if shared is None:
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(url, json=PAYLOAD)
+            else:
+                response = await shared.post(url, json=PAYLOAD)
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return samples
+
+
+async def main(args):
+    server = await start_stub_server(args.port, args.latency)
+    url = stub_url(args.port)
+    try:
+        fresh = await run(url, args.requests, args.concurrency)
+        shared = build_http_client(http2=False)
+        try:
+            pooled = await run(url, args.requests, args.concurrency, shared=shared)
+        finally:
+            await shared.aclose()
+    finally:
+        server.should_exit = True
+
+    print(format_summary("client per request", summarize(fresh)))
+    print(format_summary("shared pooled client", summarize(pooled)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,111 @@
+"""
+Upstream chat calls against a fault-injecting stub, with and without the
+resilient client's retries, hedging and circuit breaker.
+
+    python benchmarks/llm_resilience.py --requests 400 --error-rate 0.1 --slow-rate 0.05
+
+Runs three phases on an in-process stub: a single attempt per call, the
+default retry policy, and retries plus hedging. A final outage phase (every
+request fails) shows the breaker opening and calls failing fast.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.http_client import build_http_client  # noqa: E402
+from backend.llm_client import CircuitBreaker, CircuitOpen, ResilientLLMClient, UpstreamError  # noqa: E402
+from common import format_summary, summarize  # noqa: E402
+from stub_llm import configure_faults, start_stub_server, stub_url  # noqa: E402
+
+PAYLOAD = {
+    "model": "llama3-8b-8192",
+    "messages": [{"role": "user", "content": "I feel stressed about work"}],
+    "temperature": 0.7,
+    "max_tokens": 800,
+}
+
+
+async def run(llm, client, count, concurrency):
+    samples, outcomes = [], {"ok": 0, "failed": 0, "degraded": 0}
+    queue = asyncio.Queue()
+    for _ in range(count):
+        queue.put_nowait(None)
+
+    async def worker():
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                await llm.complete(client, PAYLOAD, {})
+                outcomes["ok"] += 1
+            except CircuitOpen:
+                outcomes["degraded"] += 1
+            except UpstreamError:
+                outcomes["failed"] += 1
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return samples, outcomes
+
+
+def report(label, samples, outcomes):
+    print(format_summary(label, summarize(samples)) +
+          f" ok={outcomes['ok']} failed={outcomes['failed']} degraded={outcomes['degraded']}")
+
+
+async def main(args):
+    server = await start_stub_server(args.port, args.latency)
+    url = stub_url(args.port)
+    faults = dict(error_rate=args.error_rate, throttle_rate=args.throttle_rate, slow_rate=args.slow_rate,
+                  slow_latency=args.slow_latency, hang_rate=args.hang_rate, hang_seconds=args.attempt_timeout * 4,
+                  retry_after=0)
+    client = build_http_client(http2=False)
+    no_breaker = dict(failure_threshold=10 ** 9, reset_timeout=0)
+
+    phases = [
+        ("single attempt", dict(max_retries=0)),
+        ("retries", dict()),
+        ("retries + hedging p90", dict(hedge_percentile=90)),
+    ]
+    for label, options in phases:
+        configure_faults(args.seed, **faults)
+        llm = ResilientLLMClient(url, attempt_timeout=args.attempt_timeout, deadline=args.deadline,
+                                 breaker=CircuitBreaker(**no_breaker), **options)
+        if options.get("hedge_percentile"):
+            # Warm the latency window so hedging has a percentile to work from
+            configure_faults(args.seed)
+            await run(llm, client, 50, args.concurrency)
+            configure_faults(args.seed, **faults)
+        report(label, *await run(llm, client, args.requests, args.concurrency))
+
+    configure_faults(args.seed, error_rate=1.0, retry_after=0)
+    llm = ResilientLLMClient(url, attempt_timeout=args.attempt_timeout, deadline=args.deadline,
+                             breaker=CircuitBreaker(failure_threshold=5, reset_timeout=60))
+    report("outage with breaker", *await run(llm, client, args.requests, args.concurrency))
+
+    await client.aclose()
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=9102)
+    parser.add_argument("--latency", type=float, default=0.05, help="base stub latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--throttle-rate", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    parser.add_argument("--hang-rate", type=float, default=0.01)
+    parser.add_argument("--attempt-timeout", type=float, default=2.0)
+    parser.add_argument("--deadline", type=float, default=6.0)
+    parser.add_argument("--seed", type=int, default=11)
+    asyncio.run(main(parser.parse_args()))
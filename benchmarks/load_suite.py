@@ -0,0 +1,351 @@
+"""
+Reproducible mixed-workload load test across the main API routes.
+
+    python benchmarks/load_suite.py --duration 60 --concurrency 32
+    python benchmarks/load_suite.py --compare benchmarks/results/<previous>.json
+
+Starts its own stack unless told otherwise: a throwaway mongod (from PATH,
+or --mongod) on a temporary dbpath, the stub LLM, and the backend under
+uvicorn pointed at both. Pass --mongodb-url to use an existing MongoDB
+instead, or --base-url to drive an already running backend. Results per
+route (throughput, errors, p50/p95/p99) are written as JSON tagged with
+the current git commit so runs can be compared between commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+
+from common import format_summary, summarize
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Relative weight of each operation in the default workload
+DEFAULT_MIX = ("login=5,register=1,notes_list=30,notes_get=20,notes_create=15,"
+               "notes_update=10,notes_delete=5,chat=14")
+
+MESSAGES = [
+    "I had a rough day at work and feel drained",
+    "Finally finished my project, feeling proud",
+    "Can't sleep, worried about the exam tomorrow",
+    "Went for a long walk and feel calm now",
+    "My friend cancelled again and I'm annoyed",
+]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"unknown operation in --mix: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+class Stack:
+    """Child processes (mongod, stub LLM, backend) started for one run."""
+
+    def __init__(self):
+        self.processes = []
+        self.tmpdir = None
+
+    def spawn(self, args, env=None):
+        process = subprocess.Popen(args, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.processes.append(process)
+        return process
+
+    def start_mongod(self, binary, port):
+        self.tmpdir = tempfile.mkdtemp(prefix="moodwise-bench-")
+        self.spawn([binary, "--dbpath", self.tmpdir, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"])
+        return f"mongodb://127.0.0.1:{port}"
+
+    def stop(self):
+        for process in reversed(self.processes):
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self.tmpdir:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+async def wait_for(url, process=None, timeout=30.0):
+    """Poll url until it answers; give up at once if the process serving it exits."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise SystemExit(f"{' '.join(process.args)} exited with code {process.returncode}; "
+                                 "run it by hand to see why")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise SystemExit(f"timed out waiting for {url}")
+
+
+async def wait_for_mongod(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise SystemExit("timed out waiting for mongod")
+
+
+async def start_stack(args, stack):
+    mongodb_url = args.mongodb_url
+    if mongodb_url is None:
+        mongodb_url = stack.start_mongod(args.mongod, args.mongod_port)
+        await wait_for_mongod(args.mongod_port)
+    env = dict(os.environ)
+    if args.llm_provider == "stub":
+        # The backend's built-in stub provider: no HTTP hop to an LLM at all
+        env.update({"LLM_PROVIDER": "stub", "LLM_STUB_LATENCY": str(args.llm_latency)})
+    else:
+        stack.spawn([sys.executable, "benchmarks/stub_llm.py", "--port", str(args.stub_port),
+                     "--latency", str(args.llm_latency)])
+        env.update({
+            "LLM_PROVIDER": "groq",
+            "GROQ_API_URL": f"http://127.0.0.1:{args.stub_port}/openai/v1/chat/completions",
+            "GROQ_API_KEY": "stub",
+        })
+    env.update({
+        "MONGODB_URL": mongodb_url,
+        "DATABASE_NAME": f"bench_{secrets.token_hex(4)}",
+        # Every simulated client shares one IP; re-enable with --env RATE_LIMIT_BACKEND=memory
+        "RATE_LIMIT_BACKEND": "off",
+    })
+    for pair in args.env:
+        key, _, value = pair.partition("=")
+        env[key] = value
+    backend = stack.spawn([sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+                           "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+                          env=env)
+    base_url = f"http://127.0.0.1:{args.port}"
+    await wait_for(base_url + "/", backend)
+    return base_url
+
+
+class User:
+    def __init__(self, username, password, token):
+        self.username = username
+        self.password = password
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.note_ids = []
+
+
+async def new_user(client):
+    username = f"bench_{secrets.token_hex(6)}"
+    password = "benchmark-pass"
+    response = await client.post("/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": password
+    })
+    response.raise_for_status()
+    response = await client.post("/auth/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return User(username, password, response.json()["access_token"])
+
+
+def note_body(rng):
+    return {"title": f"Note {rng.randint(0, 10 ** 6)}", "content": rng.choice(MESSAGES) + ". " * rng.randint(1, 40)}
+
+
+# Each operation returns (route label, response)
+async def op_login(client, user, rng):
+    return "POST /auth/login", await client.post(
+        "/auth/login", data={"username": user.username, "password": user.password})
+
+
+async def op_register(client, user, rng):
+    username = f"bench_{secrets.token_hex(6)}"
+    return "POST /auth/register", await client.post("/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": "benchmark-pass"
+    })
+
+
+async def op_notes_list(client, user, rng):
+    return "GET /notes/", await client.get("/notes/", params={"limit": 50}, headers=user.headers)
+
+
+async def op_notes_get(client, user, rng):
+    if not user.note_ids:
+        return await op_notes_create(client, user, rng)
+    return "GET /notes/{id}", await client.get(f"/notes/{rng.choice(user.note_ids)}", headers=user.headers)
+
+
+async def op_notes_create(client, user, rng):
+    response = await client.post("/notes/", json=note_body(rng), headers=user.headers)
+    if response.status_code == 201:
+        user.note_ids.append(response.json()["id"])
+    return "POST /notes/", response
+
+
+async def op_notes_update(client, user, rng):
+    if not user.note_ids:
+        return await op_notes_create(client, user, rng)
+    return "PUT /notes/{id}", await client.put(
+        f"/notes/{rng.choice(user.note_ids)}", json=note_body(rng), headers=user.headers)
+
+
+async def op_notes_delete(client, user, rng):
+    if len(user.note_ids) < 2:
+        return await op_notes_create(client, user, rng)
+    note_id = user.note_ids.pop(rng.randrange(len(user.note_ids)))
+    return "DELETE /notes/{id}", await client.delete(f"/notes/{note_id}", headers=user.headers)
+
+
+async def op_chat(client, user, rng):
+    return "POST /emotional-chat/chat", await client.post(
+        "/emotional-chat/chat", json={"message": rng.choice(MESSAGES)}, headers=user.headers)
+
+
+OPERATIONS = {
+    "login": op_login,
+    "register": op_register,
+    "notes_list": op_notes_list,
+    "notes_get": op_notes_get,
+    "notes_create": op_notes_create,
+    "notes_update": op_notes_update,
+    "notes_delete": op_notes_delete,
+    "chat": op_chat,
+}
+
+
+async def run_workload(args, base_url):
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        users = await asyncio.gather(*[new_user(client) for _ in range(args.users)])
+        seed_rng = random.Random(args.seed)
+        for user in users:
+            for _ in range(args.notes_per_user):
+                await op_notes_create(client, user, seed_rng)
+
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(index):
+            rng = random.Random(args.seed * 1000 + index)
+            # One user per worker, so a note is never deleted under another worker's read
+            user = users[index % len(users)]
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    label, response = await OPERATIONS[name](client, user, rng)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    # Transport failures are reported under the operation name
+                    label, ok = name, False
+                samples[label].append(time.perf_counter() - started)
+                if not ok:
+                    errors[label] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(i) for i in range(args.concurrency)])
+        elapsed = time.perf_counter() - started
+
+    routes = {}
+    for label in sorted(samples):
+        routes[label] = dict(summarize(samples[label]), errors=errors[label],
+                             throughput_rps=len(samples[label]) / elapsed)
+    everything = [s for route_samples in samples.values() for s in route_samples]
+    overall = dict(summarize(everything), errors=sum(errors.values()), throughput_rps=len(everything) / elapsed)
+    return {"elapsed_s": elapsed, "overall": overall, "routes": routes}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, previous):
+    print(f"\nversus {previous['commit']} ({previous['timestamp']}):")
+    for label, route in current["routes"].items():
+        before = previous["routes"].get(label)
+        if before is None:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            if before[key]:
+                changes.append(f"{key}={(route[key] / before[key] - 1) * 100:+.1f}%")
+        print(f"{label:<28} " + " ".join(changes))
+
+
+async def main(args):
+    stack = Stack()
+    try:
+        base_url = args.base_url or await start_stack(args, stack)
+        result = await run_workload(args, base_url)
+    finally:
+        stack.stop()
+
+    commit = git_commit()
+    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    report = {
+        "commit": commit,
+        "timestamp": timestamp,
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        **result,
+    }
+    for label, route in result["routes"].items():
+        print(format_summary(label, route) + f" errors={route['errors']} rps={route['throughput_rps']:.1f}")
+    print(format_summary("overall", result["overall"]) + f" rps={result['overall']['throughput_rps']:.1f}")
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{commit}-{timestamp}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="drive an already running backend instead of starting one")
+    parser.add_argument("--mongodb-url", help="use this MongoDB instead of starting a throwaway mongod")
+    parser.add_argument("--mongod", default="mongod", help="mongod binary to start")
+    parser.add_argument("--mongod-port", type=int, default=27199)
+    parser.add_argument("--port", type=int, default=8099, help="port for the backend under test")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--llm-provider", choices=["server", "stub"], default="server",
+                        help="stub LLM over HTTP (server) or the backend's in-process stub provider")
+    parser.add_argument("--stub-port", type=int, default=9199)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub LLM reply delay in seconds")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the backend, e.g. --env CHAT_CACHE_BACKEND=memory")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights, e.g. notes_list=3,chat=1")
+    parser.add_argument("--users", type=int, default=20, help="keep >= --concurrency to avoid note races")
+    parser.add_argument("--notes-per-user", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="JSON report path (default benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="previous JSON report to diff against")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""
+Measure /notes/ latency while a burst of logins hammers bcrypt.
+
+    python benchmarks/login_storm.py --logins 200 --login-concurrency 50
+
+Run once against the current tree and once with PASSWORD_HASH_WORKERS=1
+(or an older checkout) to compare /notes/ p99 with and without the pool.
+
+Start the backend with RATE_LIMIT_BACKEND=off, as load_suite.py does: the
+storm comes from one IP and one username, so the login limits would answer
+most of it with 429 before bcrypt ever runs.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from common import DEFAULT_BASE_URL, format_summary, register_and_login, summarize
+
+
+async def notes_loop(client, token, stop, samples):
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/notes/", headers=headers)
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+
+async def login_worker(client, username, password, queue, samples, statuses):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        started = time.perf_counter()
+        response = await client.post(
+            "/auth/login", data={"username": username, "password": password}
+        )
+        samples.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.login_concurrency + args.readers + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        username, password, token = await register_and_login(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(args.notes):
+            await client.post(
+                "/notes/", json={"title": f"note {i}", "content": "x" * 200}, headers=headers
+            )
+
+        # Baseline: /notes/ with no concurrent logins
+        stop = asyncio.Event()
+        baseline = []
+        readers = [asyncio.create_task(notes_loop(client, token, stop, baseline)) for _ in range(args.readers)]
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        await asyncio.gather(*readers)
+
+        # Storm: /notes/ while logins run
+        stop = asyncio.Event()
+        during = []
+        login_samples = []
+        statuses = {}
+        queue = asyncio.Queue()
+        for _ in range(args.logins):
+            queue.put_nowait(None)
+        readers = [asyncio.create_task(notes_loop(client, token, stop, during)) for _ in range(args.readers)]
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            login_worker(client, username, password, queue, login_samples, statuses)
+            for _ in range(args.login_concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*readers)
+
+    print(format_summary("GET /notes/ (idle)", summarize(baseline)))
+    print(format_summary("GET /notes/ (login storm)", summarize(during)))
+    print(format_summary("POST /auth/login", summarize(login_samples)))
+    print(f"logins: {args.logins} in {elapsed:.2f}s, status codes: {statuses}")
+    if statuses.get(429):
+        print("logins were rate limited, so bcrypt was not under load; restart the backend with RATE_LIMIT_BACKEND=off")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--notes", type=int, default=20)
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    asyncio.run(main(parser.parse_args()))
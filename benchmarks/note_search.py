@@ -0,0 +1,96 @@
+"""
+Search latency over a large synthetic note corpus.
+
+    python benchmarks/note_search.py --notes 100000 --queries 500
+
+Registers a benchmark user through the API, bulk-loads the corpus straight
+into the local mongod the backend uses (--mongodb-url / --database), then
+times GET /notes/search over HTTP.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from common import DEFAULT_BASE_URL, format_summary, register_and_login, summarize
+
+VOCABULARY = ("morning evening journal therapy gratitude anxiety deadline project family friend walk "
+              "sleep coffee exercise meditation weekend travel budget grocery recipe birthday meeting "
+              "presentation exam lecture garden rain sunshine music guitar novel podcast").split()
+
+
+def synthetic_note(rng, user_id, now):
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(40, 300))]
+    stamp = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+    return {
+        "title": " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 6))).capitalize(),
+        "content": " ".join(words),
+        "user_id": user_id,
+        "created_at": stamp,
+        "updated_at": stamp,
+    }
+
+
+async def load_corpus(args, user_id):
+    rng = random.Random(args.seed)
+    client = AsyncIOMotorClient(args.mongodb_url)
+    notes = client[args.database].notes
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    for start in range(0, args.notes, 5000):
+        batch = [synthetic_note(rng, user_id, now) for _ in range(min(5000, args.notes - start))]
+        await notes.insert_many(batch, ordered=False)
+    client.close()
+    return time.perf_counter() - started
+
+
+async def main(args):
+    rng = random.Random(args.seed + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        _, _, token = await register_and_login(client)
+        headers = {"Authorization": f"Bearer {token}"}
+        me = (await client.get("/auth/users/me", headers=headers)).json()
+        load_elapsed = await load_corpus(args, ObjectId(me["id"]))
+        print(f"loaded {args.notes} notes in {load_elapsed:.1f}s")
+
+        queries = [" ".join(rng.sample(VOCABULARY, rng.randint(1, 3))) for _ in range(args.queries)]
+        samples = []
+        queue = asyncio.Queue()
+        for query in queries:
+            queue.put_nowait(query)
+
+        async def worker():
+            while True:
+                try:
+                    query = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                response = await client.get("/notes/search", params={"q": query, "limit": 20}, headers=headers)
+                samples.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - started
+
+    print(format_summary("GET /notes/search", summarize(samples)))
+    print(f"throughput: {len(samples) / elapsed:.1f} queries/s at concurrency {args.concurrency}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default=os.getenv("DATABASE_NAME", "fastauth_notes"))
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=13)
+    asyncio.run(main(parser.parse_args()))
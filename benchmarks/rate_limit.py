@@ -0,0 +1,66 @@
+"""
+Per-request overhead of the rate limiter backends.
+
+    python benchmarks/rate_limit.py --checks 100000 --keys 10000
+    python benchmarks/rate_limit.py --mongodb-url mongodb://localhost:27017
+
+Times the work one chat request adds: two bucket checks (IP and user) and
+acquiring plus releasing an in-flight slot. The memory backend runs
+in-process; the Mongo backend is only measured when --mongodb-url is given.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.rate_limit import MemoryLimiterBackend, MongoLimiterBackend  # noqa: E402
+from common import format_summary, summarize  # noqa: E402
+
+
+async def measure(backend, checks, keys, rng):
+    samples = []
+    for _ in range(checks):
+        key = str(rng.randrange(keys))
+        started = time.perf_counter()
+        await backend.take(f"chat_ip:{key}", 120, 60)
+        await backend.take(f"chat_user:{key}", 30, 60)
+        if await backend.acquire_slot(f"chat_in_flight:{key}", 2):
+            await backend.release_slot(f"chat_in_flight:{key}")
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    samples = await measure(MemoryLimiterBackend(), args.checks, args.keys, rng)
+    print(format_summary("memory backend", summarize(samples)))
+
+    if args.mongodb_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.mongodb_url)
+        db = client[args.database]
+
+        async def get_db():
+            return db
+
+        checks = min(args.checks, args.mongo_checks)
+        samples = await measure(MongoLimiterBackend(get_db), checks, args.keys, rng)
+        print(format_summary("mongo backend", summarize(samples)))
+        await db.rate_limits.drop()
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checks", type=int, default=100000, help="simulated chat requests")
+    parser.add_argument("--mongo-checks", type=int, default=5000, help="cap on requests against Mongo")
+    parser.add_argument("--keys", type=int, default=10000, help="distinct users/IPs")
+    parser.add_argument("--mongodb-url")
+    parser.add_argument("--database", default="rate_limit_bench")
+    parser.add_argument("--seed", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
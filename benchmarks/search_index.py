@@ -0,0 +1,66 @@
+"""
+Build time, snapshot round trip and query latency of the in-process
+note search index (SEARCH_BACKEND=memory).
+
+    python benchmarks/search_index.py --notes 100000 --queries 2000
+
+Runs entirely in-process; no server or database needed.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.search import NoteIndex  # noqa: E402
+from common import format_summary, summarize  # noqa: E402
+from note_search import VOCABULARY  # noqa: E402
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    notes = [
+        (f"{i:024x}",
+         " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 6))),
+         " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(40, 300))))
+        for i in range(args.notes)
+    ]
+
+    index = NoteIndex()
+    started = time.perf_counter()
+    for doc_id, title, content in notes:
+        index.add("bench-user", doc_id, title, content)
+    build_elapsed = time.perf_counter() - started
+    index.built_at = datetime.utcnow()
+
+    path = os.path.join(tempfile.mkdtemp(), "notes.idx")
+    started = time.perf_counter()
+    index.save(path)
+    save_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    loaded = NoteIndex()
+    loaded.load(path)
+    load_elapsed = time.perf_counter() - started
+
+    queries = [" ".join(rng.sample(VOCABULARY, rng.randint(1, 3))) for _ in range(args.queries)]
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        loaded.search("bench-user", query, 21)
+        samples.append(time.perf_counter() - started)
+
+    print(f"build   : {args.notes} notes in {build_elapsed:.2f}s ({args.notes / build_elapsed:.0f} notes/s)")
+    print(f"snapshot: save {save_elapsed:.2f}s, load {load_elapsed:.2f}s, {os.path.getsize(path) / 2**20:.1f} MiB")
+    print(format_summary("search (top 21)", summarize(samples)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=13)
+    main(parser.parse_args())
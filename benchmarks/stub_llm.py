@@ -0,0 +1,143 @@
+"""
+Deterministic stand-in for the Groq chat completions API.
+
+Run standalone and point the backend at it:
+
+    python benchmarks/stub_llm.py --port 9100 --latency 0.2
+    GROQ_API_URL=http://127.0.0.1:9100/openai/v1/chat/completions GROQ_API_KEY=stub \\
+        uvicorn backend.main:app
+
+Other benchmarks start it in-process with ``start_stub_server``. Faults can
+be injected with --error-rate, --throttle-rate, --hang-rate and --slow-rate
+(or ``configure_faults`` in-process) to exercise retries and the breaker.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Stub LLM")
+app.state.latency = 0.0
+app.state.token_delay = 0.0
+app.state.faults = {"error_rate": 0.0, "throttle_rate": 0.0, "hang_rate": 0.0, "slow_rate": 0.0,
+                    "slow_latency": 2.0, "hang_seconds": 60.0, "retry_after": 1}
+app.state.rng = random.Random(0)
+
+EMOTIONS = ["calm", "happy", "sad", "anxious", "hopeful"]
+
+
+def reply_for(messages):
+    """Deterministic reply derived from the last user message."""
+    last = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    digest = hashlib.sha1(last.encode()).digest()
+    emotion = EMOTIONS[digest[0] % len(EMOTIONS)]
+    return f"I hear you. You said: {last[:200]} Let's take it one step at a time. [EMOTION: {emotion}]"
+
+
+def usage_for(messages, content):
+    prompt_tokens = sum(len(m.get("content", "")) // 4 for m in messages)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(content) // 4,
+        "total_tokens": prompt_tokens + len(content) // 4,
+    }
+
+
+def configure_faults(seed: int = 0, **faults):
+    """Set fault injection rates (fractions of requests) and related knobs."""
+    unknown = set(faults) - set(app.state.faults)
+    if unknown:
+        raise ValueError(f"unknown faults: {sorted(unknown)}")
+    app.state.faults.update(faults)
+    app.state.rng = random.Random(seed)
+
+
+async def inject_fault():
+    """Return an error response for this request, or None to answer normally."""
+    faults, rng = app.state.faults, app.state.rng
+    roll = rng.random()
+    if roll < faults["error_rate"]:
+        return JSONResponse({"error": {"message": "injected failure"}}, status_code=rng.choice([500, 502, 503]))
+    roll -= faults["error_rate"]
+    if roll < faults["throttle_rate"]:
+        return JSONResponse({"error": {"message": "rate limited"}}, status_code=429,
+                            headers={"Retry-After": str(faults["retry_after"])})
+    roll -= faults["throttle_rate"]
+    if roll < faults["hang_rate"]:
+        await asyncio.sleep(faults["hang_seconds"])
+    elif roll - faults["hang_rate"] < faults["slow_rate"]:
+        await asyncio.sleep(faults["slow_latency"])
+    return None
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if app.state.latency:
+        await asyncio.sleep(app.state.latency)
+    fault = await inject_fault()
+    if fault is not None:
+        return fault
+    messages = body.get("messages", [])
+    content = reply_for(messages)
+    usage = usage_for(messages, content)
+    if body.get("stream"):
+        return StreamingResponse(stream_reply(content, usage), media_type="text/event-stream")
+    return {
+        "id": "stub-completion",
+        "object": "chat.completion",
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+
+async def stream_reply(content, usage=None):
+    """Emit the reply as OpenAI-style chunks of a few characters each, with usage on the last one like Groq."""
+    for start in range(0, len(content), 6):
+        chunk = {"choices": [{"index": 0, "delta": {"content": content[start:start + 6]}}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+        if app.state.token_delay:
+            await asyncio.sleep(app.state.token_delay)
+    if usage:
+        final = {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": usage}}
+        yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+async def start_stub_server(port: int = 9100, latency: float = 0.0):
+    """Start the stub on 127.0.0.1 inside the running loop; returns the server."""
+    app.state.latency = latency
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    asyncio.get_running_loop().create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server
+
+
+def stub_url(port: int = 9100) -> str:
+    return f"http://127.0.0.1:{port}/openai/v1/chat/completions"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before replying")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 5xx")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction answered with 429 + Retry-After")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction that hang for a minute")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    app.state.latency = args.latency
+    app.state.token_delay = args.token_delay
+    configure_faults(args.seed, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                     hang_rate=args.hang_rate, slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend is a plain directory run as ``uvicorn backend.main:app`` from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,46 @@
+import asyncio
+
+from backend.chat_jobs import ChatJobQueue, MemoryJobStore
+
+USER = {"_id": "user-1"}
+
+
+class FlakyStore(MemoryJobStore):
+    """Memory store whose first take() and finish() fail like a dropped Mongo connection."""
+
+    def __init__(self):
+        super().__init__(queue_size=10, result_ttl=60)
+        self.failures = {"take": 1, "finish": 1}
+
+    def _fail(self, operation):
+        if self.failures[operation]:
+            self.failures[operation] -= 1
+            raise ConnectionError(f"{operation} lost the connection")
+
+    async def take(self):
+        self._fail("take")
+        return await super().take()
+
+    async def finish(self, job_id, fields):
+        self._fail("finish")
+        await super().finish(job_id, fields)
+
+
+def test_workers_survive_store_errors():
+    async def handler(user, request):
+        return {"response": request["message"]}
+
+    async def run():
+        store = FlakyStore()
+        queue = ChatJobQueue(store, handler, workers=1)
+        queue.start()
+        try:
+            job = await queue.submit(USER, {"message": "hello"})
+            finished = await queue.wait(job["_id"], USER["_id"], timeout=5)
+            assert finished["status"] == "done"
+            assert finished["result"] == {"response": "hello"}
+            assert not any(task.done() for task in queue._tasks)
+        finally:
+            await queue.shutdown()
+
+    asyncio.run(run())
@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.llm_client import CircuitBreaker, ResilientLLMClient, UpstreamError
+
+URL = "http://upstream.test/openai/v1/chat/completions"
+PAYLOAD = {"model": "llama3-8b-8192", "messages": [{"role": "user", "content": "hi"}]}
+REPLY = {"choices": [{"message": {"role": "assistant", "content": "hello"}}]}
+
+
+def make_client(handler, **options):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    llm = ResilientLLMClient(URL, attempt_timeout=1, deadline=2, max_retries=0, breaker=breaker, **options)
+    return llm, httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_non_json_reply_during_half_open_trial_does_not_wedge_breaker():
+    replies = iter([
+        httpx.Response(500),
+        httpx.Response(200, text="<html>bad gateway</html>"),
+        httpx.Response(200, json=REPLY),
+    ])
+    llm, client = make_client(lambda request: next(replies))
+
+    async def run():
+        with pytest.raises(UpstreamError):
+            await llm.complete(client, PAYLOAD, {})
+        assert llm.breaker.state == "half_open"
+        with pytest.raises(UpstreamError, match="Invalid JSON"):
+            await llm.complete(client, PAYLOAD, {})
+        assert not llm.breaker.trial_in_flight
+        assert await llm.complete(client, PAYLOAD, {}) == REPLY
+        assert llm.breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_unexpected_error_frees_half_open_trial():
+    llm, client = make_client(lambda request: httpx.Response(200, json=REPLY))
+    llm.breaker.record_failure()
+
+    async def broken(timeout):
+        raise KeyError("choices")
+
+    async def run():
+        with pytest.raises(KeyError):
+            await llm._call(broken)
+        assert not llm.breaker.trial_in_flight
+        assert await llm.complete(client, PAYLOAD, {}) == REPLY
+
+    asyncio.run(run())
+
+
+def test_stalled_stream_body_is_held_to_the_deadline_and_trips_the_breaker():
+    async def slow_body():
+        yield b"data: {}\n\n"
+        await asyncio.sleep(5)
+        yield b"data: [DONE]\n\n"
+
+    llm, client = make_client(lambda request: httpx.Response(200, content=slow_body()))
+    llm.deadline = 0.2
+
+    async def run():
+        lines = []
+        with pytest.raises(UpstreamError, match="deadline"):
+            async for line in llm.stream_lines(client, PAYLOAD, {}):
+                lines.append(line)
+        assert lines[0] == "data: {}"
+        assert llm.breaker.state != "closed"
+
+    asyncio.run(run())
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from backend.llm_providers import CoalescingProvider, LLMProvider, MeteredProvider, StubProvider
+
+MODEL = "coalescing-test-model"
+
+
+def payload_for(prompt, stream=False):
+    payload = {"model": MODEL, "messages": [{"role": "user", "content": prompt}],
+               "temperature": 0.7, "max_tokens": 800}
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, dict(model=MODEL, **labels)) or 0.0
+
+
+def test_coalesced_calls_record_usage_and_latency_once():
+    provider = CoalescingProvider(MeteredProvider(StubProvider(latency=0.05)))
+    calls_before = sample("llm_request_duration_seconds_count", stream="false", outcome="ok")
+    tokens_before = sample("llm_tokens_total", kind="completion")
+
+    async def run():
+        return await asyncio.gather(*[provider.complete(payload_for("same prompt")) for _ in range(10)])
+
+    replies = asyncio.run(run())
+    completion_tokens = replies[0]["usage"]["completion_tokens"]
+    assert sample("llm_request_duration_seconds_count", stream="false", outcome="ok") == calls_before + 1
+    assert sample("llm_tokens_total", kind="completion") == tokens_before + completion_tokens
+
+
+def test_shared_stream_stops_when_every_subscriber_leaves():
+    upstream = StubProvider(token_delay=0.01)
+    provider = CoalescingProvider(upstream)
+
+    async def run():
+        stream = provider.stream(payload_for("a long enough message to stream in several chunks", stream=True))
+        await stream.__anext__()
+        shared = next(iter(provider._streams.values()))
+        await stream.aclose()
+        assert shared.cancelled
+        await asyncio.wait([shared.task], timeout=1)
+        assert shared.task.done()
+        assert len(shared.chunks) < 5
+        assert not provider._streams
+
+    asyncio.run(run())
+
+
+def test_incomplete_provider_fails_at_construction():
+    class CompleteOnly(LLMProvider):
+        async def complete(self, payload):
+            return {}
+
+    with pytest.raises(TypeError):
+        CompleteOnly()
@@ -0,0 +1,65 @@
+import asyncio
+
+from fastapi import APIRouter, FastAPI, Request
+
+from backend.metrics import register_route_prefix, route_label
+
+
+def build_app(labels):
+    app = FastAPI()
+    auth_router, chat_router = APIRouter(), APIRouter()
+
+    @auth_router.get("/cache-stats")
+    async def auth_stats(request: Request):
+        labels.append(route_label(request.scope))
+
+    @chat_router.get("/cache-stats")
+    async def chat_stats(request: Request):
+        labels.append(route_label(request.scope))
+
+    @chat_router.get("/conversations/{conversation_id}/messages")
+    async def messages(conversation_id: str, request: Request):
+        labels.append(route_label(request.scope))
+
+    for router, prefix in ((auth_router, "/auth"), (chat_router, "/emotional-chat")):
+        app.include_router(router, prefix=prefix)
+        register_route_prefix(router, prefix)
+    return app
+
+
+async def get(app, path):
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "http_version": "1.1", "scheme": "http",
+        "server": ("testserver", 80), "client": ("testclient", 50000),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+def test_prefixed_routes_get_distinct_templated_labels():
+    labels = []
+    app = build_app(labels)
+
+    async def run():
+        await get(app, "/auth/cache-stats")
+        await get(app, "/emotional-chat/cache-stats")
+        await get(app, "/emotional-chat/conversations/abc/messages")
+
+    asyncio.run(run())
+    assert labels == [
+        "/auth/cache-stats",
+        "/emotional-chat/cache-stats",
+        "/emotional-chat/conversations/{conversation_id}/messages",
+    ]
+
+
+def test_unmatched_request_is_labelled_unmatched():
+    assert route_label({"type": "http", "path": "/nope"}) == "unmatched"
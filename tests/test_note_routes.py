@@ -0,0 +1,142 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+
+from backend.routes.note_routes import (
+    BulkNoteRequest, NoteCreate, NoteUpdate, bulk_notes, create_note, delete_note, update_note
+)
+
+USER = {"_id": ObjectId()}
+
+
+class MemoryNotes:
+    """Just enough of a Motor collection for the single-note endpoints."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def _match(self, query):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and doc["user_id"] == query["user_id"]:
+            return doc
+        return None
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = dict(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def find_one_and_update(self, query, update, return_document=None):
+        doc = self._match(query)
+        if doc is None:
+            return None
+        doc.update(update.get("$set", {}))
+        for field in update.get("$unset", {}):
+            doc.pop(field, None)
+        return dict(doc)
+
+    async def find(self, query, projection=None):
+        for note_id in query["_id"]["$in"]:
+            doc = self._match({"_id": note_id, "user_id": query["user_id"]})
+            if doc is not None:
+                yield dict(doc)
+
+    async def delete_one(self, query):
+        doc = self._match(query)
+        if doc is not None:
+            del self.docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=int(doc is not None))
+
+
+class CountingCollection:
+    """Wraps a collection and records every method called on it."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        def counted(*args, **kwargs):
+            self.calls.append(name)
+            return method(*args, **kwargs)
+
+        return counted
+
+
+def test_note_writes_are_one_round_trip_each():
+    db = SimpleNamespace(notes=CountingCollection(MemoryNotes()))
+
+    async def run():
+        note = await create_note(NoteCreate(title="Monday", content="I feel great today"), current_user=USER, db=db)
+        assert db.notes.calls == ["insert_one"]
+
+        db.notes.calls.clear()
+        updated = await update_note(note["id"], NoteUpdate(content="Worried about the deadline"),
+                                    current_user=USER, db=db)
+        assert db.notes.calls == ["find_one_and_update"]
+        assert updated["content"] == "Worried about the deadline"
+
+        db.notes.calls.clear()
+        await delete_note(note["id"], current_user=USER, db=db)
+        assert db.notes.calls == ["delete_one"]
+
+    asyncio.run(run())
+
+
+def test_title_only_edit_keeps_the_emotion_tag():
+    db = SimpleNamespace(notes=CountingCollection(MemoryNotes()))
+
+    async def run():
+        note = await create_note(NoteCreate(title="Monday", content="I feel great today"), current_user=USER, db=db)
+        assert note["emotion"] is not None
+        renamed = await update_note(note["id"], NoteUpdate(title="Tuesday"), current_user=USER, db=db)
+        assert renamed["emotion"] == note["emotion"]
+
+        rewritten = await update_note(note["id"], NoteUpdate(content="Worried about the deadline"),
+                                      current_user=USER, db=db)
+        assert "emotion" not in rewritten
+
+    asyncio.run(run())
+
+
+class UnconfirmedNotes(MemoryNotes):
+    """Applies nothing and reports only a write concern error, as a lagging replica set would."""
+
+    async def bulk_write(self, requests, ordered=True):
+        raise BulkWriteError({"writeErrors": [], "writeConcernErrors": [{"errmsg": "waiting for replication timed out"}]})
+
+
+def test_bulk_reports_unconfirmed_writes():
+    db = SimpleNamespace(notes=UnconfirmedNotes())
+
+    async def run():
+        note = await create_note(NoteCreate(title="Monday", content="I feel great today"), current_user=USER, db=db)
+        request = BulkNoteRequest(operations=[
+            {"op": "create", "title": "Tuesday", "content": "Calm and rested"},
+            {"op": "delete", "id": note["id"]},
+        ])
+        response = await bulk_notes(request, current_user=USER, db=db)
+        assert [result.status for result in response["results"]] == ["unconfirmed", "unconfirmed"]
+        assert "replication" in response["results"][0].error
+
+    asyncio.run(run())
+
+
+def test_bulk_rejects_a_note_targeted_twice():
+    db = SimpleNamespace(notes=CountingCollection(MemoryNotes()))
+    note_id = str(ObjectId())
+    request = BulkNoteRequest(operations=[
+        {"op": "update", "id": note_id, "title": "Renamed"},
+        {"op": "delete", "id": note_id},
+    ])
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(bulk_notes(request, current_user=USER, db=db))
+    assert error.value.status_code == 400
+    assert db.notes.calls == []